@@ -1,30 +1,108 @@
 import sys
-from backend import update_data, get_rasp
+from backend import (
+    update_data, update_from_source, get_rasp, load_rasp, effective_conflicts, retry_delay, load_check_time
+)
 from datetime import date, datetime
 from PyQt6.QtWidgets import (
     QApplication, QWidget, QLabel, QVBoxLayout, QHBoxLayout, QPushButton,
-    QStackedWidget, QScrollArea, QGridLayout, QComboBox
+    QStackedWidget, QScrollArea, QGridLayout, QComboBox, QLineEdit
 )
-from PyQt6.QtCore import Qt
+from PyQt6.QtCore import Qt, QThread, QTimer, pyqtSignal
 from PyQt6.QtGui import QFont, QPixmap
 
-from config import all_rooms
+from config import all_rooms, data_source
+from rooms import RoomIndex
+from timetable import changed_slots, conflict_slots, lesson_bit, TeacherSchedule
+from timetable_view import TimetableModel, TimetableView, LessonDelegate, build_day_cells, build_teacher_cells
 
 DAYS = ["ПОНЕДЕЛЬНИК", "ВТОРНИК", "СРЕДА", "ЧЕТВЕРГ", "ПЯТНИЦА", "СУББОТА"]
+REFRESH_INTERVAL_MS = 3600 * 1000
+# Через сколько данные считаются устаревшими и подсвечиваются в строке возраста данных
+STALE_AFTER_SECONDS = 2 * 3600
+
+# Общая таблица стилей приложения: разбирается один раз, а ячейки только переключают
+# динамическое свойство free вместо собственного setStyleSheet.
+# Ячейки уроков рисует LessonDelegate, подсветку изменений он берёт из HighlightRole
+APP_STYLESHEET = """
+QLabel#corner_icon { background: transparent; }
+QLabel[free="true"] {
+    background-color: #ccffcc; color: black; padding: 6px;
+    border: 1px solid gray; border-radius: 5px;
+}
+QLabel#data_age[stale="true"] { color: #cc0000; font-weight: bold; }
+"""
+
+
+def set_style_property(widget, name, value):
+    # После смены динамического свойства Qt нужно заново применить стиль к виджету
+    widget.setProperty(name, value)
+    widget.style().unpolish(widget)
+    widget.style().polish(widget)
+
+
+class RefreshThread(QThread):
+    # Скачивание и разбор расписания в фоне, чтобы интерфейс не зависал на сети
+    loaded = pyqtSignal(object, object)
+    # После каждой попытки: True, если источник ответил (даже если ничего не изменилось)
+    refreshed = pyqtSignal(bool)
+
+    def __init__(self, data_source=None, parent=None):
+        super().__init__(parent)
+        # Текущее постоянное расписание: если all не изменился, он не разбирается заново
+        self.rasp_const = None
+        # Сервер или папка с готовым снимком (config.data_source) и ETag/время его последней версии
+        self.data_source = data_source
+        self.source_validator = None
+
+    def run(self):
+        try:
+            is_ok = self.refresh()
+        except Exception as e:
+            print(f"Ошибка обновления расписания: {e}")
+            is_ok = False
+        self.refreshed.emit(is_ok)
+
+    def refresh(self):
+        if self.data_source:
+            try:
+                result, self.source_validator = update_from_source(self.data_source, self.source_validator)
+                if result is not None:
+                    self.loaded.emit(*result)
+                return True
+            except Exception as e:
+                print(f"Источник {self.data_source} недоступен, обновление с Яндекс Диска: {e}")
+
+        # Если файл не скачался, остаются прежние данные, а не разбор старых файлов с диска
+        updated, failed = update_data()
+        if updated:
+            self.loaded.emit(*get_rasp(None if "all" in updated else self.rasp_const))
+        return not failed
 
 
 class ScheduleApp(QWidget):
     def __init__(self):
         super().__init__()
 
-        update_data()
+        QApplication.instance().setStyleSheet(APP_STYLESHEET)
 
         self.TIME_LAST_CHECK = datetime.now()
-        self.DAY_RAPISANIE, self.ALL_RASPISANIE = get_rasp()
+        self.DAY_RAPISANIE, self.ALL_RASPISANIE = load_rasp()
+        self.changed_slots = changed_slots(self.DAY_RAPISANIE.changes)
+        self.conflict_slots = conflict_slots(effective_conflicts(self.DAY_RAPISANIE, self.ALL_RASPISANIE))
+        self.teacher_schedule = TeacherSchedule(self.ALL_RASPISANIE, self.DAY_RAPISANIE)
+        self.room_index = RoomIndex(self.DAY_RAPISANIE, self.ALL_RASPISANIE)
 
         self.current_day_index = date.today().weekday() % len(DAYS)
-        self.current_data = self.get_raspisanie_changes()
-        self.name_classes = sorted(self.current_data)
+        self.name_classes = self.get_class_names()
+
+        # Когда данные последний раз сверялись с источником (сохраняется в tmp/last_check)
+        checked_at = load_check_time()
+        self.data_checked_at = datetime.fromtimestamp(checked_at) if checked_at is not None else None
+        self.refresh_attempt = 0
+
+        # Готовые ячейки сетки по (день, версия данных); версия растёт при каждом обновлении
+        self.data_version = 0
+        self.menu_cells_cache = {}
         self.setWindowTitle("Расписание")
         self.showFullScreen()
 
@@ -49,24 +127,79 @@ class ScheduleApp(QWidget):
         layout = QVBoxLayout(self)
         layout.addWidget(self.stack)
 
-    def get_raspisanie_changes(self):
-        return self.DAY_RAPISANIE.get(DAYS[self.current_day_index], self.ALL_RASPISANIE[DAYS[self.current_day_index]])
+        self.refresh_thread = RefreshThread(data_source, self)
+        self.refresh_thread.loaded.connect(self.on_rasp_loaded)
+        self.refresh_thread.refreshed.connect(self.on_refresh_finished)
+        QApplication.instance().aboutToQuit.connect(self.refresh_thread.wait)
+
+        # Следующее обновление планируется после каждой попытки: через час после удачной
+        # и через несколько минут (с растущей задержкой) после сбоя
+        self.refresh_timer = QTimer(self)
+        self.refresh_timer.setSingleShot(True)
+        self.refresh_timer.timeout.connect(self.start_refresh)
+        self.start_refresh()
+
+        self.data_age_timer = QTimer(self)
+        self.data_age_timer.setInterval(60 * 1000)
+        self.data_age_timer.timeout.connect(self.update_data_age)
+        self.data_age_timer.start()
 
-    def get_raspisanie_const(self):
-        return self.ALL_RASPISANIE[DAYS[self.current_day_index]]
+    def get_class_names(self):
+        day = DAYS[self.current_day_index]
+        return self.get_day_timetable(day).class_names(day)
+
+    def start_refresh(self):
+        self.TIME_LAST_CHECK = datetime.now()
+        if not self.refresh_thread.isRunning():
+            self.refresh_thread.rasp_const = self.ALL_RASPISANIE
+            self.refresh_thread.start()
 
     def check_update_rasp(self):
         if (datetime.now() - self.TIME_LAST_CHECK).seconds > 3600 or datetime.now().day > self.TIME_LAST_CHECK.day:
-            self.TIME_LAST_CHECK = datetime.now()
-            update_data()
-            self.DAY_RAPISANIE, self.ALL_RASPISANIE = get_rasp()
-            self.create_menu_page()
+            self.start_refresh()
+
+    def on_refresh_finished(self, is_ok):
+        if is_ok:
+            self.refresh_attempt = 0
+            self.data_checked_at = datetime.now()
+            delay_ms = REFRESH_INTERVAL_MS
+        else:
+            delay_ms = int(retry_delay(self.refresh_attempt) * 1000)
+            self.refresh_attempt += 1
+        self.refresh_timer.start(delay_ms)
+        self.update_data_age()
+
+    def update_data_age(self):
+        if self.data_checked_at is None:
+            text, is_stale = "Расписание ещё не сверялось с источником", True
+        else:
+            minutes = int((datetime.now() - self.data_checked_at).total_seconds() // 60)
+            age = "только что" if minutes < 1 else f"{minutes} мин назад" if minutes < 60 else f"{minutes // 60} ч {minutes % 60} мин назад"
+            text = f"Обновлено в {self.data_checked_at:%H:%M} ({age})"
+            is_stale = minutes * 60 >= STALE_AFTER_SECONDS
+        if self.refresh_attempt:
+            text += f", нет связи - повтор через {max(self.refresh_timer.remainingTime(), 0) // 60000 + 1} мин"
+        self.data_age_label.setText(text)
+        if self.data_age_label.property("stale") != is_stale:
+            set_style_property(self.data_age_label, "stale", is_stale)
+
+    def on_rasp_loaded(self, day_raspisanie, all_raspisanie):
+        # Слот выполняется в потоке интерфейса: подменяем данные целиком одним присваиванием
+        if all_raspisanie is not self.ALL_RASPISANIE:
+            self.teacher_schedule.set_base(all_raspisanie)
+        self.teacher_schedule.set_day(day_raspisanie)
+        self.DAY_RAPISANIE, self.ALL_RASPISANIE = day_raspisanie, all_raspisanie
+        self.changed_slots = changed_slots(day_raspisanie.changes)
+        self.conflict_slots = conflict_slots(effective_conflicts(day_raspisanie, all_raspisanie))
+        self.room_index = RoomIndex(day_raspisanie, all_raspisanie)
+        self.data_version += 1
+        self.menu_cells_cache.clear()
+        self.update_dropdowns()
+        self.render_menu_grid()
 
     def create_menu_page(self):
         layout = QVBoxLayout()
 
-        self.current_data = self.get_raspisanie_changes()
-
         header_layout = QHBoxLayout()
 
         if not hasattr(self, 'day_label'):
@@ -98,53 +231,22 @@ class ScheduleApp(QWidget):
 
         layout.addLayout(header_layout)
 
-        self.menu_scroll = QScrollArea()
-        self.menu_container = QWidget()
-        grid = QGridLayout()
-
-        all_lessons = {}
-        for cls, lessons in self.current_data.items():
-            for lesson in lessons:
-                key = (lesson['урок'], cls)
-                all_lessons.setdefault(key, []).append(lesson)
-
-        class_names = sorted(self.current_data.keys())
+        self.data_age_label = QLabel()
+        self.data_age_label.setObjectName("data_age")
+        self.data_age_label.setFont(QFont("Arial", 10))
+        self.data_age_label.setAlignment(Qt.AlignmentFlag.AlignRight)
+        layout.addWidget(self.data_age_label)
+        self.update_data_age()
 
-        for col, cls in enumerate(class_names):
-            header = QLabel(cls)
-            header.setFont(QFont("Arial", 12, QFont.Weight.Bold))
-            header.setAlignment(Qt.AlignmentFlag.AlignCenter)
-            grid.addWidget(header, 0, col + 1)
-
-        for row in range(7):
-            label = QLabel(f"{row + 1}")
-            label.setFont(QFont("Arial", 12))
-            grid.addWidget(label, row + 1, 0)
-
-            for col, cls in enumerate(class_names):
-                lessons = all_lessons.get((row + 1, cls), [])
-                if not lessons or (len(lessons) == 1 and {'урок': row + 1, 'отличается' : True} in lessons):
-                    content = "—"
-                else:
-                    content = "\n---\n".join(
-                        f"{l['предмет']} {f'({l['кабинет']})' if l['кабинет'] else ''}\n{l['учитель']}" for l in lessons)
-                cell = QLabel(content)
-                cell.setStyleSheet(
-                    f"background-color: {'yellow' if any(l.get('отличается', False) for l in lessons) else 'white'}; color: black; padding: 3px; border: 1px solid gray; border-radius: 5px; font-size: 8pt;")
-                cell.setWordWrap(True)
-                cell.setFixedWidth(140)
-                grid.addWidget(cell, row + 1, col + 1)
-
-        self.menu_container.setLayout(grid)
-        self.menu_container.update()
-        self.menu_scroll.setWidget(self.menu_container)
-        self.menu_scroll.setWidgetResizable(True)
+        self.menu_model = TimetableModel([str(row + 1) for row in range(7)], self)
+        self.menu_view = TimetableView(self.menu_model, LessonDelegate(font_size=8, padding=3), column_width=140)
+        self.render_menu_grid()
 
         exit_btn = QPushButton("Выход")
         exit_btn.setFont(QFont("Arial", 14))
         exit_btn.clicked.connect(QApplication.quit)
 
-        layout.addWidget(self.menu_scroll)
+        layout.addWidget(self.menu_view)
         free_rooms_btn = QPushButton("Свободные кабинеты")
         free_rooms_btn.setFont(QFont("Arial", 14))
         free_rooms_btn.clicked.connect(self.show_free_rooms)
@@ -154,16 +256,27 @@ class ScheduleApp(QWidget):
 
         self.menu_page.setLayout(layout)
 
-        self.TEACHER_RASP = self.group_by_teacher()
+        self.update_dropdowns()
+
+        # self.stack.setCurrentWidget(self.teacher_schedule_page)
+
+    def update_dropdowns(self):
+        self.name_classes = self.get_class_names()
+
+        # Без блокировки сигналов clear() выбрал бы пустого учителя и открыл его страницу
+        for dropdown in (self.teacher_dropdown, self.classes_dropdown):
+            dropdown.blockSignals(True)
+
         self.teacher_dropdown.clear()
         self.teacher_dropdown.addItem("Выберите учителя")
-        self.teacher_dropdown.addItems(sorted(self.TEACHER_RASP.keys()))
+        self.teacher_dropdown.addItems(self.teacher_schedule.teacher_names())
 
         self.classes_dropdown.clear()
         self.classes_dropdown.addItem("Выберите класс")
         self.classes_dropdown.addItems(self.name_classes)
 
-        # self.stack.setCurrentWidget(self.teacher_schedule_page)
+        for dropdown in (self.teacher_dropdown, self.classes_dropdown):
+            dropdown.blockSignals(False)
 
     def show_teacher_schedule_from_menu(self, teacher):
         if teacher != "Выберите учителя":
@@ -175,14 +288,8 @@ class ScheduleApp(QWidget):
 
     def create_schedule_page(self):
         self.schedule_layout = QVBoxLayout()
-        self.schedule_grid = QGridLayout()
-        self.schedule_grid.setSpacing(10)
-
-        scroll = QScrollArea()
-        container = QWidget()
-        container.setLayout(self.schedule_grid)
-        scroll.setWidget(container)
-        scroll.setWidgetResizable(True)
+        self.schedule_model = TimetableModel([f"{i}:" for i in range(1, 8)], self)
+        self.schedule_view = TimetableView(self.schedule_model, LessonDelegate())
 
         self.class_label = QLabel("")
         self.class_label.setFont(QFont("Arial", 20))
@@ -194,18 +301,14 @@ class ScheduleApp(QWidget):
         back_btn.clicked.connect(self.back_to_menu)
 
         self.schedule_layout.addWidget(self.class_label)
-        self.schedule_layout.addWidget(scroll)
+        self.schedule_layout.addWidget(self.schedule_view)
         self.schedule_layout.addWidget(back_btn, alignment=Qt.AlignmentFlag.AlignCenter)
         self.schedule_page.setLayout(self.schedule_layout)
 
     def create_teacher_schedule_page(self):
         self.teacher_schedule_layout = QVBoxLayout()
-        self.teacher_schedule_grid = QGridLayout()
-        scroll = QScrollArea()
-        container = QWidget()
-        container.setLayout(self.teacher_schedule_grid)
-        scroll.setWidget(container)
-        scroll.setWidgetResizable(True)
+        self.teacher_schedule_model = TimetableModel([f"{i}:" for i in range(1, 8)], self)
+        self.teacher_schedule_view = TimetableView(self.teacher_schedule_model, LessonDelegate())
 
         self.teacher_name_label = QLabel("")
         self.teacher_name_label.setFont(QFont("Arial", 20))
@@ -217,92 +320,32 @@ class ScheduleApp(QWidget):
         back_btn.clicked.connect(lambda: self.stack.setCurrentWidget(self.menu_page))
 
         self.teacher_schedule_layout.addWidget(self.teacher_name_label)
-        self.teacher_schedule_layout.addWidget(scroll)
+        self.teacher_schedule_layout.addWidget(self.teacher_schedule_view)
         self.teacher_schedule_layout.addWidget(back_btn, alignment=Qt.AlignmentFlag.AlignCenter)
         self.teacher_schedule_page.setLayout(self.teacher_schedule_layout)
 
     def show_schedule(self, class_name : str):
         self.class_label.setText(f"Расписание для {class_name}")
 
-        for i in reversed(range(self.schedule_grid.count())):
-            widget = self.schedule_grid.itemAt(i).widget()
-            if widget:
-                widget.deleteLater()
-
+        timetable = self.ALL_RASPISANIE
+        strings = timetable.strings
+        texts = {}
         for col, day in enumerate(DAYS):
-            header = QLabel(day)
-            header.setFont(QFont("Arial", 12, QFont.Weight.Bold))
-            header.setAlignment(Qt.AlignmentFlag.AlignCenter)
-            self.schedule_grid.addWidget(header, 0, col + 1)
-
-            if not day in self.ALL_RASPISANIE:
-                continue
-            lessons = self.ALL_RASPISANIE[day].get(class_name, [])
+            for row in timetable.class_rows(day, class_name):
+                lesson_number = timetable.lessons[row]
+                if 1 <= lesson_number <= 7:
+                    texts.setdefault((lesson_number - 1, col), []).append(
+                        f"{strings[timetable.subjects[row]]} ({strings[timetable.rooms[row]]})\n{strings[timetable.teachers[row]]}")
 
-            for i in range(1, 8):
-                label = QLabel(f"{i}:")
-                label.setFont(QFont("Arial", 12))
-                self.schedule_grid.addWidget(label, i, 0)
-
-                cell_texts = [
-                    f"{l['предмет']} ({l['кабинет']})\n{l['учитель']}"
-                    for l in lessons if l['урок'] == i
-                ]
-
-                content = "\n---\n".join(cell_texts) if cell_texts else "—"
-
-                text_label = QLabel(content)
-                text_label.setStyleSheet(
-                    "background-color: white; color: black; padding: 8px; border: 1px solid #999; border-radius: 6px;")
-                text_label.setWordWrap(True)
-                self.schedule_grid.addWidget(text_label, i, col + 1)
+        cells = {key: ("\n---\n".join(cell_texts), False, False) for key, cell_texts in texts.items()}
 
+        self.schedule_model.set_grid(DAYS, cells)
         self.stack.setCurrentWidget(self.schedule_page)
 
-    def group_by_teacher(self):
-        teachers = {}
-        for day, classes in self.ALL_RASPISANIE.items():
-            for cls, lessons in classes.items():
-                for lesson in lessons:
-                    teacher = lesson['учитель']
-                    teachers.setdefault(teacher, {}).setdefault(day, []).append({
-                        **lesson,
-                        'класс': cls
-                    })
-        return teachers
-
     def show_teacher_schedule(self, teacher_name):
         self.teacher_name_label.setText(f"Расписание: {teacher_name}")
-        self.teacher_schedule_grid.setSpacing(10)
-
-        for i in reversed(range(self.teacher_schedule_grid.count())):
-            widget = self.teacher_schedule_grid.itemAt(i).widget()
-            if widget:
-                widget.deleteLater()
-
-        for col, day in enumerate(DAYS):
-            header = QLabel(day)
-            header.setFont(QFont("Arial", 12, QFont.Weight.Bold))
-            header.setAlignment(Qt.AlignmentFlag.AlignCenter)
-            self.teacher_schedule_grid.addWidget(header, 0, col + 1)
-
-            lessons = self.TEACHER_RASP.get(teacher_name, {}).get(day, [])
-
-            for i in range(1, 8):
-                label = QLabel(f"{i}:")
-                label.setFont(QFont("Arial", 12))
-                self.teacher_schedule_grid.addWidget(label, i, 0)
-
-                cell_texts = [
-                    f"{l['предмет']} ({l['кабинет']})\n{l['класс']}"
-                    for l in lessons if l['урок'] == i
-                ]
-                content = "\n---\n".join(cell_texts) if cell_texts else "—"
-                cell = QLabel(content)
-                cell.setStyleSheet("background-color: white; color: black; padding: 8px; border: 1px solid #999; border-radius: 6px;")
-                cell.setWordWrap(True)
-                self.teacher_schedule_grid.addWidget(cell, i, col + 1)
-
+        cells = build_teacher_cells(self.teacher_schedule, teacher_name, DAYS)
+        self.teacher_schedule_model.set_grid(DAYS, cells)
         self.stack.setCurrentWidget(self.teacher_schedule_page)
 
     def prev_day(self):
@@ -318,66 +361,34 @@ class ScheduleApp(QWidget):
         self.show_menu_page()
 
     def show_menu_page(self):
-        self.day_label.setText(DAYS[self.current_day_index])
-        self.current_data = self.get_raspisanie_changes()
+        self.render_menu_grid()
+        self.stack.setCurrentWidget(self.menu_page)
 
-        container = self.menu_container
-        layout = container.layout()
+    def render_menu_grid(self):
+        day = DAYS[self.current_day_index]
+        self.day_label.setText(day)
 
-        if layout is None:
-            layout = QGridLayout()
-            container.setLayout(layout)
-        else:
-            while layout.count():
-                item = layout.takeAt(0)
-                widget = item.widget()
-                if widget:
-                    widget.deleteLater()
-
-        all_lessons = {}
-        for cls, lessons in self.current_data.items():
-            for lesson in lessons:
-                key = (lesson['урок'], cls)
-                all_lessons.setdefault(key, []).append(lesson)
-
-        class_names = sorted(self.current_data.keys())
-
-        for col, cls in enumerate(class_names):
-            header = QLabel(cls)
-            header.setFont(QFont("Arial", 12, QFont.Weight.Bold))
-            header.setAlignment(Qt.AlignmentFlag.AlignCenter)
-            header.setFixedWidth(140)
-            layout.addWidget(header, 0, col + 1)
+        # Модель сама сообщит виду только об изменившихся ячейках
+        self.menu_model.set_grid(*self.get_menu_cells(day))
 
-        for row in range(7):
-            label = QLabel(f"{row + 1}")
-            label.setFont(QFont("Arial", 12))
-            layout.addWidget(label, row + 1, 0)
-
-            for col, cls in enumerate(class_names):
-                lessons = all_lessons.get((row + 1, cls), [])
-                if not lessons or (len(lessons) == 1 and {'урок': row + 1, 'отличается': True} in lessons):
-                    content = "—"
-                else:
-                    content = "\n---\n".join(
-                        f"{l['предмет']} {f'({l['кабинет']})' if l['кабинет'] else ''}\n{l['учитель']}" for l in
-                        lessons)
-                cell = QLabel(content)
-                cell.setStyleSheet(
-                    f"background-color: {'yellow' if any(l.get('отличается', False) for l in lessons) else 'white'}; color: black; padding: 3px; border: 1px solid gray; border-radius: 5px; font-size: 8pt;")
-                cell.setWordWrap(True)
-                cell.setFixedWidth(140)
-                layout.addWidget(cell, row + 1, col + 1)
-
-        self.menu_container.update()
-        self.stack.setCurrentWidget(self.menu_page)
+    def get_menu_cells(self, day):
+        # Текст ячеек форматируется один раз на каждое обновление данных, а не при каждом переходе
+        key = (day, self.data_version)
+        if key not in self.menu_cells_cache:
+            self.menu_cells_cache[key] = build_day_cells(
+                self.get_day_timetable(day), day, self.changed_slots, self.conflict_slots)
+        return self.menu_cells_cache[key]
+
+    def get_day_timetable(self, day):
+        # Расписание с изменениями, если на этот день они есть, иначе постоянное
+        return self.DAY_RAPISANIE if day in self.DAY_RAPISANIE else self.ALL_RASPISANIE
 
     def add_corner_icon(self, page):
         icon = QLabel(page)
         icon.setPixmap(QPixmap("icon.ico").scaled(40, 40, Qt.AspectRatioMode.KeepAspectRatio, Qt.TransformationMode.SmoothTransformation))
         icon.setGeometry(page.width() - 620, 1090, 40, 40)
         icon.setAttribute(Qt.WidgetAttribute.WA_TranslucentBackground)
-        icon.setStyleSheet("background: transparent;")
+        icon.setObjectName("corner_icon")
         icon.raise_()
 
     def create_free_rooms_page(self):
@@ -401,27 +412,21 @@ class ScheduleApp(QWidget):
         back_btn.setFixedSize(120, 40)
         back_btn.clicked.connect(self.back_to_menu)
 
-        self.free_rooms_layout.addWidget(self.free_rooms_label)
-        self.free_rooms_layout.addWidget(scroll)
-        self.free_rooms_layout.addWidget(back_btn, alignment=Qt.AlignmentFlag.AlignCenter)
-        self.free_rooms_page.setLayout(self.free_rooms_layout)
-
-    def show_free_rooms(self):
-        for i in reversed(range(self.free_rooms_grid.count())):
-            widget = self.free_rooms_grid.itemAt(i).widget()
-            if widget:
-                widget.deleteLater()
-
-        busy_rooms_by_lesson = {i: set() for i in range(1, 8)}
-        for cls, lessons in self.current_data.items():
-            for lesson in lessons:
-                if lesson.get('кабинет', False):
-                    busy_rooms_by_lesson[lesson['урок']].add(lesson['кабинет'].replace("_", ""))
+        # Поиск по кабинетам: лишние столбцы скрываются, сетка не перестраивается
+        self.free_rooms_search = QLineEdit()
+        self.free_rooms_search.setFont(QFont("Arial", 14))
+        self.free_rooms_search.setPlaceholderText("Поиск: 31, этаж 3, 4-6, урок 2")
+        self.free_rooms_search.setClearButtonEnabled(True)
+        self.free_rooms_search.textChanged.connect(self.filter_free_rooms)
 
+        # Сетка создаётся один раз, при показе у ячеек только переключается свойство free
+        self.free_room_cells = {}
+        self.free_room_headers = {}
         for col, room in enumerate(all_rooms):
             header = QLabel(str(room))
             header.setFont(QFont("Arial", 12, QFont.Weight.Bold))
             header.setAlignment(Qt.AlignmentFlag.AlignCenter)
+            self.free_room_headers[room] = header
             self.free_rooms_grid.addWidget(header, 0, col + 1)
 
         for row in range(1, 8):
@@ -430,15 +435,43 @@ class ScheduleApp(QWidget):
             self.free_rooms_grid.addWidget(label, row, 0)
 
             for col, room in enumerate(all_rooms):
-                is_busy = str(room) in busy_rooms_by_lesson[row]
-                if not is_busy:
-                    cell = QLabel("Свободен")
-                    cell.setStyleSheet("background-color: #ccffcc; color: black; padding: 6px; border: 1px solid gray; border-radius: 5px;")
-                    cell.setAlignment(Qt.AlignmentFlag.AlignCenter)
-                    self.free_rooms_grid.addWidget(cell, row, col + 1)
+                cell = QLabel()
+                cell.setProperty("free", False)
+                cell.setAlignment(Qt.AlignmentFlag.AlignCenter)
+                self.free_room_cells[(row, room)] = cell
+                self.free_rooms_grid.addWidget(cell, row, col + 1)
 
+        self.free_rooms_layout.addWidget(self.free_rooms_label)
+        self.free_rooms_layout.addWidget(self.free_rooms_search)
+        self.free_rooms_layout.addWidget(scroll)
+        self.free_rooms_layout.addWidget(back_btn, alignment=Qt.AlignmentFlag.AlignCenter)
+        self.free_rooms_page.setLayout(self.free_rooms_layout)
+
+    def show_free_rooms(self):
+        day = DAYS[self.current_day_index]
+        self.free_rooms_label.setText(f"Свободные кабинеты на {day}")
+
+        for row in range(1, 8):
+            for room in all_rooms:
+                is_busy = bool(self.room_index.busy_mask(day, room) & lesson_bit(row))
+                cell = self.free_room_cells[(row, room)]
+                if cell.property("free") == (not is_busy):
+                    continue
+                cell.setText("" if is_busy else "Свободен")
+                set_style_property(cell, "free", not is_busy)
+
+        self.filter_free_rooms(self.free_rooms_search.text())
         self.stack.setCurrentWidget(self.free_rooms_page)
 
+    def filter_free_rooms(self, text):
+        shown = set(self.room_index.search(DAYS[self.current_day_index], text))
+        for room, header in self.free_room_headers.items():
+            visible = room in shown
+            if header.isHidden() != visible:
+                continue
+            header.setVisible(visible)
+            for row in range(1, 8):
+                self.free_room_cells[(row, room)].setVisible(visible)
 
     def back_to_menu(self):
         self.check_update_rasp()
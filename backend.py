@@ -1,77 +1,212 @@
+import os
 import re
-import requests
+import csv
+import gzip
+import json
+import sys
+import hashlib
+import time
+import random
+import marshal
 import socket
-
-import pandas as pd
-
-from copy import deepcopy
-from collections import defaultdict
-
-pattern_day = r'^(Понедельник|Вторник|Среда|Четверг|Пятница|Суббота)$'
-
-
-def lessons_equal(l1, l2):
-    return (
-            l1['предмет'].strip() == l2['предмет'].strip() and
-            l1['кабинет'].strip() == l2['кабинет'].strip() and
-            l1['учитель'].strip() == l2['учитель'].strip()
-    )
-
-
-def group_by_urok(lessons):
-    grouped = {}
-    for lesson in lessons:
-        num = lesson['урок']
-        grouped.setdefault(num, []).append(lesson)
-    return grouped
+import threading
+
+from concurrent.futures import ThreadPoolExecutor
+
+from history import record_version
+from timetable import (
+    Timetable, Change, Conflict, room_key,
+    CANCELLED, ADDED, ROOM_CHANGED, TEACHER_SUBSTITUTED, MOVED, REPLACED, ROOM_CONFLICT, TEACHER_CONFLICT
+)
+
+# requests и openpyxl импортируются внутри функций, которые их используют:
+# их загрузка заметно замедляет запуск киоска, а нужны они только при обновлении данных
+
+pattern_day = re.compile(r'^(Понедельник|Вторник|Среда|Четверг|Пятница|Суббота)$', re.IGNORECASE)
+pattern_class = re.compile(r'\d{1,2} [а-я]')
+pattern_room_number = re.compile(r'[-+]?\d+(\.\d+)?')
+
+LESSON_NUMBERS = range(1, 8)
+
+API_URL = "https://cloud-api.yandex.net/v1/disk/public/resources"
+# Поля метаданных Яндекс Диска, по которым определяем, что файл изменился
+META_FIELDS = ("md5", "sha256", "modified", "size")
+SCHEDULE_NAMES = ("day", "all")
+DOWNLOAD_CHUNK_SIZE = 256 * 1024
+
+# Снимок последнего разобранного расписания для мгновенного старта.
+# Версию нужно увеличивать при любом изменении Timetable.to_state
+SNAPSHOT_PATH = 'tmp/snapshot.bin'
+SNAPSHOT_VERSION = 3
+# Время последней удачной сверки с источником (даже если ничего не изменилось)
+CHECK_TIME_PATH = 'tmp/last_check'
+
+# Проверка связи: результат кешируется, пока свежий; без связи повторные проверки
+# идут с растущим интервалом от минимального до максимального (в секундах)
+CONNECTIVITY_TTL = 60
+CONNECTIVITY_MIN_BACKOFF = 5
+CONNECTIVITY_MAX_BACKOFF = 900
+
+# Повтор неудачного обновления: экспоненциальная задержка со случайным разбросом (в секундах)
+RETRY_BASE_DELAY = 30
+RETRY_MAX_DELAY = 900
+
+_session = None
+_monitor = None
+# Общие объекты создаются при первом обращении из потоков загрузки - под блокировкой
+_shared_lock = threading.Lock()
+
+
+def lesson_keys(timetable):
+    # Каждая строка нормализуется один раз, а урок превращается в хешируемый ключ
+    stripped = [value.strip() for value in timetable.strings]
+    return [
+        (stripped[subject], stripped[room], stripped[teacher])
+        for subject, room, teacher in zip(timetable.subjects, timetable.rooms, timetable.teachers)
+    ]
+
+
+def index_lessons(timetable):
+    # {(день, класс, урок): {ключи уроков}}
+    index = {}
+    strings = timetable.strings
+    day_names = timetable.day_names
+    for row, key in enumerate(lesson_keys(timetable)):
+        slot = (day_names[timetable.days[row]], strings[timetable.classes[row]], timetable.lessons[row])
+        index.setdefault(slot, set()).add(key)
+    return index
+
+
+def same_lesson(before, after):
+    # Тот же предмет у того же учителя
+    return before[0] == after[0] and before[2] == after[2]
+
+
+def diff_class(day, class_name, base_index, new_index):
+    changes = []
+    # {урок: [ключи]} исчезнувших и появившихся уроков
+    removed = {}
+    added = {}
+    for lesson_number in LESSON_NUMBERS:
+        base_keys = base_index.get((day, class_name, lesson_number), set())
+        new_keys = new_index.get((day, class_name, lesson_number), set())
+        removed[lesson_number] = sorted(base_keys - new_keys)
+        added[lesson_number] = sorted(new_keys - base_keys)
+
+    def pair_moves(matches):
+        # Урок из другого номера урока - перенос
+        for lesson_number in LESSON_NUMBERS:
+            for after in list(added[lesson_number]):
+                match = next((
+                    (from_lesson, before)
+                    for from_lesson in LESSON_NUMBERS if from_lesson != lesson_number
+                    for before in removed[from_lesson] if matches(before, after)
+                ), None)
+                if match is not None:
+                    from_lesson, before = match
+                    removed[from_lesson].remove(before)
+                    added[lesson_number].remove(after)
+                    changes.append(Change(MOVED, day, class_name, lesson_number, before, after, from_lesson))
+
+    # Сначала точно такой же урок (предмет, кабинет, учитель) в другом номере урока: иначе
+    # он мог бы попасть в замену учителя в освободившемся уроке
+    pair_moves(lambda before, after: before == after)
+
+    # Тот же предмет в том же уроке: сменился кабинет или учитель
+    for lesson_number in LESSON_NUMBERS:
+        slot_removed = removed[lesson_number]
+        for after in list(added[lesson_number]):
+            kind = ROOM_CHANGED
+            before = next((key for key in slot_removed if same_lesson(key, after)), None)
+            if before is None:
+                kind = TEACHER_SUBSTITUTED
+                before = next((key for key in slot_removed if key[0] == after[0]), None)
+            if before is not None:
+                slot_removed.remove(before)
+                added[lesson_number].remove(after)
+                changes.append(Change(kind, day, class_name, lesson_number, before, after))
+
+    # Тот же предмет у того же учителя в другом уроке (возможно, в другом кабинете) - перенос
+    pair_moves(same_lesson)
+
+    # Оставшееся: замена предмета в том же уроке, отмена или добавление
+    for lesson_number in LESSON_NUMBERS:
+        slot_removed = removed[lesson_number]
+        slot_added = added[lesson_number]
+        for before, after in zip(slot_removed, slot_added):
+            changes.append(Change(REPLACED, day, class_name, lesson_number, before, after))
+        for before in slot_removed[len(slot_added):]:
+            changes.append(Change(CANCELLED, day, class_name, lesson_number, before=before))
+        for after in slot_added[len(slot_removed):]:
+            changes.append(Change(ADDED, day, class_name, lesson_number, after=after))
+
+    return changes
 
 
 def compare_raspisanie(base_rasp, new_rasp):
-    result = deepcopy(new_rasp)
-
-    for day, classes in result.items():
-        for class_name, lessons in classes.items():
-            base_lessons = base_rasp.get(day, {}).get(class_name, [])
-            base_by_urok = group_by_urok(base_lessons)
-            res_by_urok = group_by_urok(lessons)
-
-            for urok_num in range(1, 8):
-                new_entries = res_by_urok.get(urok_num, {})
-                base_entries = base_by_urok.get(urok_num, [])
-
-                if len(new_entries) == 0 and len(base_entries) > 0:
-                    lessons.append({'урок': urok_num, 'отличается' : True})
-                    continue
-                elif len(new_entries) > 0 and len(base_entries) == 0:
-                    for entry in new_entries.values():
-                        entry['отличается'] = True
-                    continue
-
-                for entry in new_entries:
-                    if not any(lessons_equal(entry, b) for b in base_entries):
-                        entry['отличается'] = True
-                    else:
-                        entry['отличается'] = False
-
-    return result
-
-
-
-def get_raspisanie(file_name="day.csv"):
-    file_path = 'tmp/' + file_name
-
-    with open(file_path, 'r', encoding='utf-8') as f:
-        lines = f.readlines()
+    # Возвращает new_rasp со списком изменений (Change); сами данные не копируются
+    base_index = index_lessons(base_rasp)
+    new_index = index_lessons(new_rasp)
+
+    changes = []
+    for day, class_name in dict.fromkeys((day, class_name) for day, class_name, _ in new_index):
+        changes.extend(diff_class(day, class_name, base_index, new_index))
+
+    return new_rasp.with_changes(changes)
+
+
+def find_conflicts(timetable):
+    # Два хеш-соединения за один проход по урокам: по (день, урок, кабинет) и (день, урок, учитель).
+    # Один учитель с несколькими классами в одном кабинете - общий урок, а не конфликт
+    stripped = [value.strip() for value in timetable.strings]
+    by_room = {}
+    by_teacher = {}
+    for row in range(len(timetable.days)):
+        room = room_key(stripped[timetable.rooms[row]])
+        teacher = stripped[timetable.teachers[row]]
+        if not room or not teacher:
+            continue
+        slot = (timetable.days[row], timetable.lessons[row])
+        class_name = timetable.strings[timetable.classes[row]]
+        by_room.setdefault((*slot, room), []).append((teacher, class_name))
+        by_teacher.setdefault((*slot, teacher), []).append((room, class_name))
+
+    conflicts = []
+    for kind, joined in ((ROOM_CONFLICT, by_room), (TEACHER_CONFLICT, by_teacher)):
+        for (day_id, lesson_number, key), entries in joined.items():
+            others = sorted({other for other, _ in entries})
+            if len(others) > 1:
+                classes = tuple(dict.fromkeys(class_name for _, class_name in entries))
+                conflicts.append(Conflict(kind, timetable.day_names[day_id], lesson_number, key, classes, tuple(others)))
+    conflicts.sort(key=lambda conflict: (timetable.day_ids[conflict.day], conflict.lesson))
+    return conflicts
+
+
+def effective_conflicts(day_rasp, all_rasp):
+    # Для дней из файла изменений - конфликты в нём, для остальных - в постоянном расписании
+    return list(day_rasp.conflicts) + [conflict for conflict in all_rasp.conflicts if conflict.day not in day_rasp]
+
+
+def conflicts_report(conflicts):
+    lines = []
+    for conflict in conflicts:
+        classes = ", ".join(conflict.classes)
+        others = ", ".join(conflict.others)
+        if conflict.kind == ROOM_CONFLICT:
+            lines.append(f"{conflict.day}, урок {conflict.lesson}: кабинет {conflict.key} занят несколькими учителями ({others}), классы {classes}")
+        else:
+            lines.append(f"{conflict.day}, урок {conflict.lesson}: {conflict.key} стоит в нескольких кабинетах ({others}), классы {classes}")
+    return "\n".join(lines) if lines else "Конфликтов не найдено"
 
-    class_line = lines[1].strip().split(",")
 
+def get_class_columns(class_line):
     classes = {}
 
     # Определяем индексы классов
     class_indices = []
     for idx, name in enumerate(class_line):
         name = name.strip()
-        if re.match(r'\d{1,2} [а-я]', name.lower()):
+        if pattern_class.match(name.lower()):
             class_indices.append((name, idx))
 
     # Добавим последний индекс для корректного расчета диапазонов
@@ -90,25 +225,30 @@ def get_raspisanie(file_name="day.csv"):
             # одна подгруппа
             classes[name] = [start_idx]
 
-    # Парсинг расписания
-    all = {}
-    schedule = defaultdict(list)
-    i = 3
-    lesson_number = 1
+    return classes
 
-    while i < len(lines) - 1:
-        subject_line = lines[i].strip().split(",")
-        teacher_line = lines[i + 1].strip().split(",")
 
-        if re.match(pattern_day, subject_line[0], re.IGNORECASE):
-            all[subject_line[0]] = defaultdict(list)
-            schedule = all[subject_line[0]]
-            lesson_number = 1
+def parse_rows(rows):
+    rows = iter(rows)
+
+    # Первая строка - заголовок, вторая - названия классов, третья - служебная
+    next(rows, None)
+    classes = get_class_columns(next(rows, []))
+    next(rows, None)
+
+    # Парсинг расписания: строки идут парами "предметы" / "учителя"
+    all = Timetable()
+    day = None
+    lesson_number = 1
 
-        i += 2
+    for subject_line, teacher_line in zip(rows, rows):
+        if subject_line and pattern_day.match(subject_line[0].strip()):
+            day = subject_line[0].strip()
+            all.add_day(day)
+            lesson_number = 1
 
         for class_name, indices in classes.items():
-            for group_idx, col in enumerate(indices, start=1):
+            for col in indices:
                 try:
                     subject = subject_line[col].strip()
                     teacher = teacher_line[col].strip()
@@ -120,14 +260,12 @@ def get_raspisanie(file_name="day.csv"):
                     elif col + 3 < len(subject_line):
                         room = subject_line[col + 3]
 
-                    if subject:
-                        lesson = {
-                            "урок": lesson_number,
-                            "предмет": subject,
-                            "кабинет": str(int(float(room))) if bool(re.fullmatch(r'[-+]?\d+(\.\d+)?', room)) else room,
-                            "учитель": teacher
-                        }
-                        schedule[class_name].append(lesson)
+                    if subject and day is not None:
+                        all.add(
+                            day, lesson_number, class_name, subject,
+                            str(int(float(room))) if pattern_room_number.fullmatch(room) else room,
+                            teacher
+                        )
 
                 except IndexError:
                     continue
@@ -136,75 +274,444 @@ def get_raspisanie(file_name="day.csv"):
     return all
 
 
-def get_rasp():
-    rasp_changes = get_raspisanie(file_name="day.csv")
-    rasp_const = get_raspisanie(file_name="all.csv")
+def cell_text(value):
+    # Приводим значение ячейки к тому же виду, что и в CSV, которые раньше записывались через pandas
+    if value is None:
+        return ""
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
 
-    return compare_raspisanie(rasp_const, rasp_changes), rasp_const
 
+def iter_xlsx_rows(file_path):
+    import openpyxl
 
-def check_internet(host="8.8.8.8", port=53, timeout=3):
+    workbook = openpyxl.load_workbook(file_path, read_only=True, data_only=True)
     try:
-        socket.setdefaulttimeout(timeout)
-        socket.socket(socket.AF_INET, socket.SOCK_STREAM).connect((host, port))
-        return True
+        sheet = workbook.worksheets[0]
+        # Записанному в файле размеру листа (<dimension>) верить нельзя: некоторые программы
+        # пишут его неверно, и read_only обрезал бы строки. Поэтому сбрасываем его
+        sheet.reset_dimensions()
+        rows = [[cell_text(value) for value in row] for row in sheet.iter_rows(values_only=True)]
+    finally:
+        workbook.close()
+
+    # Строки бывают разной длины - дополняем до самой длинной,
+    # чтобы эвристика поиска кабинета работала так же, как на CSV
+    width = max(map(len, rows), default=0)
+    for cells in rows:
+        if len(cells) < width:
+            cells.extend([""] * (width - len(cells)))
+        yield cells
+
+
+def get_raspisanie(file_name="day.csv"):
+    file_path = 'tmp/' + file_name
+
+    if file_name.endswith(".xlsx"):
+        timetable = parse_rows(iter_xlsx_rows(file_path))
+    else:
+        with open(file_path, 'r', encoding='utf-8-sig', newline='') as f:
+            timetable = parse_rows(csv.reader(f))
+
+    # Файл без единого урока - испорченный или не тот файл; пусть останется прежнее расписание
+    if not len(timetable.days):
+        raise ValueError(f"в файле {file_name} не найдено ни одного урока")
+
+    timetable.conflicts = find_conflicts(timetable)
+    return timetable
+
+
+def read_raspisanie(name):
+    # Скачанная книга разбирается напрямую. CSV - запасной вариант, только если книги нет
+    # или CSV не старше её: старый CSV выдал бы прошлое расписание за текущее.
+    # Иначе ошибка пробрасывается, и на экране остаётся последнее удачно разобранное расписание
+    xlsx_path = 'tmp/' + name + ".xlsx"
+    csv_path = 'tmp/' + name + ".csv"
+    if not os.path.exists(xlsx_path):
+        return get_raspisanie(file_name=name + ".csv")
+
+    try:
+        return get_raspisanie(file_name=name + ".xlsx")
+    except Exception as e:
+        print(f"Ошибка при чтении Excel-файла {name}.xlsx: {e}")
+        if os.path.exists(csv_path) and os.path.getmtime(csv_path) >= os.path.getmtime(xlsx_path):
+            return get_raspisanie(file_name=name + ".csv")
+        raise
+
+
+def get_rasp(rasp_const=None):
+    # rasp_const можно передать, если all не менялся - тогда разбирается только day
+    # Каждая новая версия попадает в историю (tmp/history.sqlite3), одинаковые не дублируются
+    rasp_changes = read_raspisanie("day")
+    record_version("day", rasp_changes)
+    if rasp_const is None:
+        rasp_const = read_raspisanie("all")
+        record_version("all", rasp_const)
+
+    result = compare_raspisanie(rasp_const, rasp_changes), rasp_const
+    save_snapshot(*result)
+    return result
+
+
+def dump_snapshot(day_rasp, all_rasp):
+    return marshal.dumps((SNAPSHOT_VERSION, day_rasp.to_state(), all_rasp.to_state()))
+
+
+def parse_snapshot(data):
+    # None, если снимок другой версии
+    version, day_state, all_state = marshal.loads(data)
+    if version != SNAPSHOT_VERSION:
+        return None
+    return Timetable.from_state(day_state), Timetable.from_state(all_state)
+
+
+def write_snapshot(data, path=SNAPSHOT_PATH):
+    # Пишем во временный файл и подменяем, чтобы при сбое не остался битый снимок
+    with open(path + ".tmp", "wb") as f:
+        f.write(data)
+    os.replace(path + ".tmp", path)
+
+
+def save_snapshot(day_rasp, all_rasp, path=SNAPSHOT_PATH):
+    try:
+        write_snapshot(dump_snapshot(day_rasp, all_rasp), path)
+    except (OSError, ValueError) as e:
+        print(f"Ошибка при сохранении снимка расписания: {e}")
+
+
+def load_snapshot(path=SNAPSHOT_PATH):
+    try:
+        with open(path, "rb") as f:
+            return parse_snapshot(f.read())
+    except (OSError, ValueError, EOFError, TypeError) as e:
+        print(f"Ошибка при чтении снимка расписания: {e}")
+        return None
+
+
+def save_check_time(path=CHECK_TIME_PATH):
+    try:
+        with open(path, "w") as f:
+            f.write(str(time.time()))
+    except OSError as e:
+        print(f"Ошибка при сохранении времени проверки: {e}")
+
+
+def load_check_time(path=CHECK_TIME_PATH):
+    # timestamp последней удачной сверки с источником или None, если её не было
+    try:
+        with open(path) as f:
+            return float(f.read())
+    except (OSError, ValueError):
+        return None
+
+
+def snapshot_is_fresh(path=SNAPSHOT_PATH):
+    # Снимок годится, только если он не старше скачанных файлов
+    try:
+        snapshot_time = os.path.getmtime(path)
     except OSError:
         return False
 
+    for name in SCHEDULE_NAMES:
+        for extension in (".xlsx", ".csv"):
+            file_path = 'tmp/' + name + extension
+            if os.path.exists(file_path) and os.path.getmtime(file_path) > snapshot_time:
+                return False
+    return True
+
+
+def load_rasp():
+    # Быстрый старт: сначала готовый снимок, затем разбор уже скачанных файлов без обращения к сети
+    if snapshot_is_fresh():
+        result = load_snapshot()
+        if result is not None:
+            return result
+
+    try:
+        return get_rasp()
+    except Exception as e:
+        print(f"Ошибка: Не удалось разобрать сохранённое расписание: {e}")
+
+    # Скачанные файлы не разбираются - показываем последний удачный снимок, даже если он старше их
+    result = load_snapshot() if os.path.exists(SNAPSHOT_PATH) else None
+    return result if result is not None else (Timetable(), Timetable())
+
+
+def fetch_snapshot(source, validator=None, timeout=10):
+    # source - адрес сервера расписания или папка со snapshot.bin (см. config.data_source).
+    # validator - ETag или время изменения файла с прошлого раза.
+    # Возвращает (данные снимка или None, если он не изменился, новый validator)
+    if source.startswith(("http://", "https://")):
+        import urllib.error
+        import urllib.request
 
-def download_and_convert_yandex_xlsx(url_file, xlsx_path, csv_path):
-    if not check_internet():
+        request = urllib.request.Request(source.rstrip("/") + "/snapshot", headers={"Accept-Encoding": "gzip"})
+        if validator:
+            request.add_header("If-None-Match", validator)
+        try:
+            with urllib.request.urlopen(request, timeout=timeout) as response:
+                data = response.read()
+                if response.headers.get("Content-Encoding") == "gzip":
+                    data = gzip.decompress(data)
+                return data, response.headers.get("ETag")
+        except urllib.error.HTTPError as e:
+            if e.code == 304:
+                return None, validator
+            raise
+
+    path = os.path.join(source, os.path.basename(SNAPSHOT_PATH))
+    modified = str(os.stat(path).st_mtime_ns)
+    if modified == validator:
+        return None, validator
+    with open(path, "rb") as f:
+        return f.read(), modified
+
+
+def update_from_source(source, validator=None):
+    # Готовый снимок вместо скачивания и разбора xlsx: (day, all) или None, если ничего не изменилось
+    data, validator = fetch_snapshot(source, validator)
+    if data is None:
+        save_check_time()
+        return None, validator
+
+    result = parse_snapshot(data)
+    if result is None:
+        raise ValueError("версия снимка на источнике не совпадает с версией киоска")
+    write_snapshot(data)
+    save_check_time()
+    return result, validator
+
+
+# Состояние связи с Яндекс Диском. is_online не ждёт сети: отвечает по последнему известному
+# результату, а устаревший проверяет в фоне подключением к самому API.
+# Без связи запросы не пускаются, пока не истечёт интервал; после этого пропускается сам
+# запрос - он и есть проверка. Результаты запросов сообщаются через mark
+class ConnectivityMonitor:
+    def __init__(self, host, port=443, timeout=3, ttl=CONNECTIVITY_TTL,
+                 min_backoff=CONNECTIVITY_MIN_BACKOFF, max_backoff=CONNECTIVITY_MAX_BACKOFF):
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self.ttl = ttl
+        self.min_backoff = min_backoff
+        self.max_backoff = max_backoff
+
+        self.lock = threading.Lock()
+        # None - ещё не проверяли
+        self.online = None
+        self.checked_at = 0.0
+        self.backoff = min_backoff
+        self.probing = False
+
+    def is_online(self):
+        with self.lock:
+            age = time.monotonic() - self.checked_at
+            if self.online is None:
+                # Первую проверку делает сам запрос
+                return True
+            if self.online:
+                if age >= self.ttl:
+                    self.start_probe()
+                return True
+            # Связи не было: по истечении интервала пропускаем настоящий запрос
+            return age >= self.backoff
+
+    def start_probe(self):
+        # Вызывается под self.lock
+        if not self.probing:
+            self.probing = True
+            threading.Thread(target=self.probe, daemon=True).start()
+
+    def probe(self):
+        try:
+            with socket.create_connection((self.host, self.port), timeout=self.timeout):
+                is_online = True
+        except OSError:
+            is_online = False
+        with self.lock:
+            self.probing = False
+        self.mark(is_online)
+
+    def mark(self, is_online):
+        with self.lock:
+            if is_online:
+                self.backoff = self.min_backoff
+            elif self.online is False and time.monotonic() - self.checked_at >= self.backoff:
+                # Интервал растёт один раз на попытку, даже если параллельно упало несколько запросов
+                self.backoff = min(self.backoff * 2, self.max_backoff)
+            self.online = is_online
+            self.checked_at = time.monotonic()
+
+
+def get_monitor():
+    global _monitor
+    with _shared_lock:
+        if _monitor is None:
+            from urllib.parse import urlsplit
+
+            _monitor = ConnectivityMonitor(urlsplit(API_URL).hostname)
+        return _monitor
+
+
+def read_metadata(xlsx_path):
+    try:
+        with open(xlsx_path + ".meta", encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def write_metadata(xlsx_path, metadata):
+    with open(xlsx_path + ".meta", "w", encoding='utf-8') as f:
+        json.dump(metadata, f, ensure_ascii=False)
+
+
+def get_session():
+    # Одна сессия на весь процесс: keep-alive и пул соединений,
+    # чтобы TLS-рукопожатие с cloud-api.yandex.net происходило один раз
+    global _session
+    with _shared_lock:
+        if _session is None:
+            import requests
+
+            session = requests.Session()
+            adapter = requests.adapters.HTTPAdapter(pool_connections=len(SCHEDULE_NAMES), pool_maxsize=len(SCHEDULE_NAMES))
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            _session = session
+        return _session
+
+
+def download_file(session, url, path, metadata):
+    # Файл качается в path + ".part" и подменяет path только целиком и с совпавшей контрольной суммой.
+    # Если прошлая загрузка той же версии оборвалась, докачиваем с места обрыва (Range)
+    part_path = path + ".part"
+    offset = 0
+    if os.path.exists(part_path) and read_metadata(part_path) == metadata:
+        offset = os.path.getsize(part_path)
+    else:
+        write_metadata(part_path, metadata)
+
+    algorithm = "sha256" if metadata.get("sha256") else "md5"
+    digest = hashlib.new(algorithm)
+
+    headers = {"Range": f"bytes={offset}-"} if offset else {}
+    with session.get(url, stream=True, timeout=10, headers=headers) as r:
+        # 416 - докачивать нечего: файл уже целиком или испорчен, это покажет проверка ниже
+        has_body = r.status_code != 416
+        if has_body:
+            r.raise_for_status()
+            if r.status_code != 206:
+                # Сервер отдал файл с начала
+                offset = 0
+
+        with open(part_path, "r+b" if offset else "w+b") as f:
+            f.truncate(offset)
+            while chunk := f.read(DOWNLOAD_CHUNK_SIZE):
+                digest.update(chunk)
+            if has_body:
+                for chunk in r.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
+                    f.write(chunk)
+                    digest.update(chunk)
+            f.flush()
+            os.fsync(f.fileno())
+            size = f.tell()
+
+    expected = metadata.get(algorithm)
+    if expected and digest.hexdigest() != expected or metadata.get("size") not in (None, size):
+        os.remove(part_path)
+        os.remove(part_path + ".meta")
+        raise ValueError(f"размер или контрольная сумма {path} не совпали с метаданными")
+
+    os.replace(part_path, path)
+    os.remove(part_path + ".meta")
+
+
+def download_yandex_xlsx(url_file, xlsx_path):
+    # Возвращает True, если файл был скачан заново, False, если он не изменился, и None, если скачать не удалось
+    import requests
+
+    monitor = get_monitor()
+    if not monitor.is_online():
         print("Ошибка: Отсутствует подключение к интернету.")
-        return
+        return None
 
     try:
-        # Шаг 1: Получаем прямую ссылку на файл
-        api_url = "https://cloud-api.yandex.net/v1/disk/public/resources/download"
         params = {"public_key": url_file}
-        response = requests.get(api_url, params=params, timeout=10)
+
+        # Шаг 1: Сверяем метаданные файла с сохранёнными при прошлой загрузке
+        session = get_session()
+        response = session.get(API_URL, params=params, timeout=10)
+        monitor.mark(True)
+        response.raise_for_status()
+        resource = response.json()
+        metadata = {field: resource.get(field) for field in META_FIELDS}
+
+        if os.path.exists(xlsx_path) and read_metadata(xlsx_path) == metadata:
+            print(f"Не изменился: {xlsx_path}")
+            return False
+
+        # Шаг 2: Получаем прямую ссылку на файл
+        response = session.get(API_URL + "/download", params=params, timeout=10)
         response.raise_for_status()
 
         download_url = response.json().get("href")
         if not download_url:
             print("Ошибка: Не удалось получить ссылку для загрузки.")
-            return
+            return None
 
-        # Шаг 2: Скачиваем файл
-        with requests.get(download_url, stream=True, timeout=10) as r:
-            r.raise_for_status()
-            with open(xlsx_path, "wb") as f:
-                for chunk in r.iter_content(chunk_size=8192):
-                    f.write(chunk)
+        # Шаг 3: Скачиваем файл; разборщик видит только полностью скачанный и проверенный файл
+        download_file(session, download_url, xlsx_path, metadata)
+        write_metadata(xlsx_path, metadata)
         print(f"Скачано: {xlsx_path}")
+        return True
 
-        # Шаг 3: Конвертируем в CSV
-        try:
-            df = pd.read_excel(xlsx_path)
-            df.to_csv(csv_path, index=False, encoding='utf-8-sig')
-            print(f"Преобразовано в CSV: {csv_path}")
-        except Exception as e:
-            print(f"Ошибка при чтении/конвертации Excel-файла: {e}")
-
+    except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+        monitor.mark(False)
+        print(f"Ошибка соединения: {e}")
     except requests.exceptions.RequestException as e:
         print(f"Ошибка запроса: {e}")
     except Exception as e:
         print(f"Неожиданная ошибка: {e}")
+    return None
+
+
+def retry_delay(attempt, base=RETRY_BASE_DELAY, maximum=RETRY_MAX_DELAY):
+    # Задержка перед повтором номер attempt (с нуля). Разброс нужен, чтобы после сбоя
+    # все киоски не обращались к Яндекс Диску одновременно
+    delay = min(maximum, base * 2 ** attempt)
+    return random.uniform(delay / 2, delay)
+
+
+def update_file(name):
+    with open('tmp/' + name + "_url") as f:
+        url_file = f.read().strip()
+    return download_yandex_xlsx(
+        url_file=url_file,
+        xlsx_path='tmp/' + name + ".xlsx"
+    )
 
 
 def update_data():
-    with open("tmp/day_url") as f:
-        download_and_convert_yandex_xlsx(
-            url_file=f.read(),
-            xlsx_path='tmp/' + "day.xlsx",
-            csv_path='tmp/' + "day.csv"
-        )
-    with open("tmp/all_url") as f:
-        download_and_convert_yandex_xlsx(
-            url_file=f.read(),
-            xlsx_path='tmp/' + "all.xlsx",
-            csv_path='tmp/' + "all.csv"
-        )
+    # Возвращает (изменившиеся, не скачавшиеся) - множества имён файлов ("day", "all").
+    # Оба файла качаются параллельно через общую сессию
+    with ThreadPoolExecutor(max_workers=len(SCHEDULE_NAMES)) as executor:
+        results = list(executor.map(update_file, SCHEDULE_NAMES))
+    updated = {name for name, result in zip(SCHEDULE_NAMES, results) if result}
+    failed = {name for name, result in zip(SCHEDULE_NAMES, results) if result is None}
+    if not failed:
+        save_check_time()
+    return updated, failed
 
 
 if __name__ == "__main__":
-    update_data()
+    # python backend.py conflicts - отчёт о конфликтах в уже скачанном расписании
+    if sys.argv[1:] == ["conflicts"]:
+        print(conflicts_report(effective_conflicts(*load_rasp())))
+    # python backend.py serve [порт] - раздача разобранного расписания киоскам по HTTP
+    elif sys.argv[1:2] == ["serve"]:
+        from server import serve, DEFAULT_PORT
+        serve(int(sys.argv[2]) if len(sys.argv) > 2 else DEFAULT_PORT)
+    else:
+        update_data()
@@ -0,0 +1,127 @@
+import os
+import sys
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PyQt6.QtWidgets import QApplication, QWidget, QLabel, QGridLayout
+
+from RaspisanieCOD import APP_STYLESHEET, set_style_property
+from timetable_view import TimetableModel, TimetableView, LessonDelegate
+
+# Замер отрисовки сетки на полный день: старый способ (QLabel со своим setStyleSheet
+# у каждой ячейки) против текущего (общая таблица стилей и модель/представление).
+# Запуск: python bench_render.py [количество классов] [количество повторов]
+
+LESSONS = 7
+ROOMS = 40
+
+INLINE_CELL_STYLE = "background-color: {}; color: black; padding: 3px; border: 1px solid gray; border-radius: 5px; font-size: 8pt;"
+INLINE_FREE_STYLE = "background-color: #ccffcc; color: black; padding: 6px; border: 1px solid gray; border-radius: 5px;"
+
+free_rooms_pool = {}
+
+
+def make_cells(classes):
+    cells = {}
+    for row in range(LESSONS):
+        for col in range(classes):
+            text = f"Предмет {row} ({100 + col})\nУчитель {col}.{row}"
+            cells[(row, col)] = (text, (row + col) % 5 == 0, (row + col) % 17 == 0)
+    return cells
+
+
+def render(app, widget):
+    widget.resize(1400, 900)
+    widget.show()
+    app.processEvents()
+    widget.grab()
+    widget.close()
+
+
+def menu_inline(app, classes, cells):
+    container = QWidget()
+    grid = QGridLayout(container)
+    for (row, col), (text, highlighted, _) in cells.items():
+        cell = QLabel(text)
+        cell.setStyleSheet(INLINE_CELL_STYLE.format("yellow" if highlighted else "white"))
+        cell.setWordWrap(True)
+        cell.setFixedWidth(140)
+        grid.addWidget(cell, row + 1, col + 1)
+    render(app, container)
+    container.deleteLater()
+
+
+def menu_model_view(app, classes, cells):
+    model = TimetableModel([str(row + 1) for row in range(LESSONS)])
+    view = TimetableView(model, LessonDelegate(font_size=8, padding=3), column_width=140)
+    model.set_grid([f"{col} а" for col in range(classes)], cells)
+    render(app, view)
+    view.deleteLater()
+
+
+def free_rooms_inline(app, classes, cells):
+    container = QWidget()
+    grid = QGridLayout(container)
+    for row in range(LESSONS):
+        for col in range(ROOMS):
+            if (row + col) % 3:
+                cell = QLabel("Свободен")
+                cell.setStyleSheet(INLINE_FREE_STYLE)
+                grid.addWidget(cell, row + 1, col + 1)
+    render(app, container)
+    container.deleteLater()
+
+
+def free_rooms_property(app, classes, cells):
+    # Как в приложении: ячейки созданы один раз, при показе переключается только свойство free
+    pool = free_rooms_pool
+    if not pool:
+        container = QWidget()
+        grid = QGridLayout(container)
+        for row in range(LESSONS):
+            for col in range(ROOMS):
+                cell = QLabel()
+                cell.setProperty("free", False)
+                pool[(row, col)] = cell
+                grid.addWidget(cell, row + 1, col + 1)
+        pool["container"] = container
+        pool["shift"] = 0
+
+    pool["shift"] += 1
+    for row in range(LESSONS):
+        for col in range(ROOMS):
+            cell = pool[(row, col)]
+            is_free = bool((row + col + pool["shift"]) % 3)
+            if cell.property("free") != is_free:
+                cell.setText("Свободен" if is_free else "")
+                set_style_property(cell, "free", is_free)
+    render(app, pool["container"])
+
+
+def measure(app, function, classes, cells, repeats):
+    samples = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        function(app, classes, cells)
+        samples.append(time.perf_counter() - start)
+        app.processEvents()
+    return min(samples)
+
+
+if __name__ == "__main__":
+    classes = int(sys.argv[1]) if len(sys.argv) > 1 else 40
+    repeats = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+
+    app = QApplication(sys.argv)
+    app.setStyleSheet(APP_STYLESHEET)
+    cells = make_cells(classes)
+
+    print(f"Сетка дня: {LESSONS} уроков x {classes} классов, лучший из {repeats} запусков")
+    for name, before, after in (
+            ("Главная страница", menu_inline, menu_model_view),
+            ("Свободные кабинеты", free_rooms_inline, free_rooms_property),
+    ):
+        before_time = measure(app, before, classes, cells, repeats)
+        after_time = measure(app, after, classes, cells, repeats)
+        print(f"{name}: было {before_time * 1000:.1f} мс, стало {after_time * 1000:.1f} мс")
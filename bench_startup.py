@@ -0,0 +1,83 @@
+import os
+import sys
+import time
+import subprocess
+
+# Замер времени запуска киоска:
+#   1) время импорта backend по данным `python -X importtime`;
+#   2) время от запуска процесса до первого показанного окна.
+# Запуск: python bench_startup.py [количество повторов]
+
+FIRST_WINDOW_SCRIPT = """
+import os, sys
+from PyQt6.QtWidgets import QApplication
+from RaspisanieCOD import ScheduleApp
+
+app = QApplication(sys.argv)
+window = ScheduleApp()
+window.show()
+app.processEvents()
+print("shown", flush=True)
+os._exit(0)
+"""
+
+
+def import_times(module="backend", top=10):
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True, env=bench_env()
+    )
+
+    # Строки вида: "import time:  self [us] | cumulative | imported package"
+    times = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        times.append((int(cumulative_us), int(self_us), name.strip()))
+
+    total = next((cumulative for cumulative, _, name in times if name == module), 0)
+    return total, sorted(times, reverse=True)[:top]
+
+
+def bench_env():
+    # Данные (tmp/) берутся из текущей папки, код - из папки со скриптом
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.path.dirname(os.path.abspath(__file__))
+    return env
+
+
+def time_to_first_window():
+    env = bench_env()
+    env.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+    start = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-c", FIRST_WINDOW_SCRIPT],
+        stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True, env=env
+    )
+    for line in process.stdout:
+        if line.strip() == "shown":
+            elapsed = time.perf_counter() - start
+            break
+    else:
+        elapsed = None
+    process.wait()
+    return elapsed
+
+
+if __name__ == "__main__":
+    repeats = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+
+    total, slowest = import_times()
+    print(f"Импорт backend: {total / 1000:.1f} мс")
+    for cumulative, self_us, name in slowest:
+        print(f"  {cumulative / 1000:8.1f} мс  {name}")
+
+    samples = [time_to_first_window() for _ in range(repeats)]
+    samples = [sample for sample in samples if sample is not None]
+    if samples:
+        print(f"До первого окна: мин {min(samples) * 1000:.0f} мс, "
+              f"медиана {sorted(samples)[len(samples) // 2] * 1000:.0f} мс ({len(samples)} запусков)")
+    else:
+        print("Окно не было показано")
@@ -1 +1,6 @@
-all_rooms = [113, 114, 115, 117, 217, 220, 221, 222, 224, 306, 307, 308, 314, 315, 316, 317, 318, 319, 321, 322, 327, 'СпЗл1', 'СпЗл2']
\ No newline at end of file
+all_rooms = [113, 114, 115, 117, 217, 220, 221, 222, 224, 306, 307, 308, 314, 315, 316, 317, 318, 319, 321, 322, 327, 'СпЗл1', 'СпЗл2']
+# Откуда киоск берёт расписание: None - сам скачивает файлы с Яндекс Диска;
+# "http://сервер:8080" - готовый снимок с сервера (python backend.py serve);
+# путь к папке - файл snapshot.bin в ней (например, общая папка tmp сервера).
+# Если источник недоступен, киоск обновляется напрямую с Яндекс Диска
+data_source = None
@@ -0,0 +1,152 @@
+import zlib
+import marshal
+import sqlite3
+
+from contextlib import closing
+from datetime import date, datetime, time
+
+from timetable import Timetable
+
+# История скачанных версий расписания. Каждая версия хранится как разница с предыдущей
+# по ячейкам (день, класс, урок), каждая FULL_COPY_EVERY-я - целиком, чтобы восстановление
+# любой даты проходило не больше FULL_COPY_EVERY записей.
+HISTORY_PATH = 'tmp/history.sqlite3'
+FULL_COPY_EVERY = 20
+
+
+def timetable_slots(timetable):
+    # {(день, класс, урок): ((предмет, кабинет, учитель), ...)} в порядке строк файла
+    strings = timetable.strings
+    slots = {}
+    for row in range(len(timetable.days)):
+        slot = (timetable.day_names[timetable.days[row]], strings[timetable.classes[row]], timetable.lessons[row])
+        lesson = (strings[timetable.subjects[row]], strings[timetable.rooms[row]], strings[timetable.teachers[row]])
+        slots[slot] = slots.get(slot, ()) + (lesson,)
+    return slots
+
+
+def slots_delta(previous, current):
+    # Изменившиеся ячейки; пустой кортеж - ячейка исчезла
+    delta = {slot: lessons for slot, lessons in current.items() if previous.get(slot) != lessons}
+    delta.update({slot: () for slot in previous if slot not in current})
+    return delta
+
+
+def build_timetable(days, classes, slots):
+    day_order = {day: index for index, day in enumerate(days)}
+    class_order = {class_name: index for index, class_name in enumerate(classes)}
+
+    timetable = Timetable()
+    for day in days:
+        timetable.add_day(day)
+    for day, class_name, lesson_number in sorted(slots, key=lambda slot: (day_order[slot[0]], slot[2], class_order[slot[1]])):
+        for subject, room, teacher in slots[(day, class_name, lesson_number)]:
+            timetable.add(day, lesson_number, class_name, subject, room, teacher)
+    return timetable
+
+
+def moment_key(moment):
+    # Дата без времени означает "на конец этого дня"
+    if isinstance(moment, datetime):
+        return moment.isoformat(timespec="seconds")
+    if isinstance(moment, date):
+        return datetime.combine(moment, time.max).isoformat(timespec="seconds")
+    return moment
+
+
+def open_history(path=HISTORY_PATH):
+    connection = sqlite3.connect(path)
+    connection.execute(
+        "CREATE TABLE IF NOT EXISTS versions ("
+        "id INTEGER PRIMARY KEY, name TEXT NOT NULL, fetched_at TEXT NOT NULL, "
+        "is_full INTEGER NOT NULL, data BLOB NOT NULL)"
+    )
+    connection.execute("CREATE INDEX IF NOT EXISTS versions_name_time ON versions (name, fetched_at)")
+    return connection
+
+
+def load_state(connection, name, version_id):
+    # Последняя полная копия до версии и все разницы после неё
+    full_id = connection.execute(
+        "SELECT MAX(id) FROM versions WHERE name = ? AND is_full = 1 AND id <= ?", (name, version_id)
+    ).fetchone()[0]
+
+    days, classes, slots = (), (), {}
+    for (data,) in connection.execute(
+            "SELECT data FROM versions WHERE name = ? AND id BETWEEN ? AND ? ORDER BY id", (name, full_id, version_id)):
+        days, classes, delta = marshal.loads(zlib.decompress(data))
+        slots.update(delta)
+    return days, classes, {slot: lessons for slot, lessons in slots.items() if lessons}
+
+
+def record_version(name, timetable, fetched_at=None, path=HISTORY_PATH):
+    # name - "day" или "all". Возвращает True, если версия отличается от предыдущей и сохранена
+    days = tuple(timetable.day_names)
+    classes = tuple(dict.fromkeys(timetable.strings[class_id] for class_id in timetable.classes))
+    slots = timetable_slots(timetable)
+
+    try:
+        with closing(open_history(path)) as connection, connection:
+            last_id = connection.execute("SELECT MAX(id) FROM versions WHERE name = ?", (name,)).fetchone()[0]
+            is_full = last_id is None
+            if not is_full:
+                previous_days, previous_classes, previous_slots = load_state(connection, name, last_id)
+                delta = slots_delta(previous_slots, slots)
+                if not delta and (previous_days, previous_classes) == (days, classes):
+                    return False
+
+                chain_length = connection.execute(
+                    "SELECT COUNT(*) FROM versions WHERE name = ? AND id > "
+                    "(SELECT MAX(id) FROM versions WHERE name = ? AND is_full = 1)", (name, name)
+                ).fetchone()[0]
+                is_full = chain_length + 1 >= FULL_COPY_EVERY
+
+            data = zlib.compress(marshal.dumps((days, classes, slots if is_full else delta)))
+            connection.execute(
+                "INSERT INTO versions (name, fetched_at, is_full, data) VALUES (?, ?, ?, ?)",
+                (name, moment_key(fetched_at or datetime.now()), int(is_full), data)
+            )
+        return True
+    except (sqlite3.Error, ValueError) as e:
+        print(f"Ошибка при сохранении истории расписания {name}: {e}")
+        return False
+
+
+def list_versions(name, path=HISTORY_PATH):
+    # [(номер версии, время скачивания, полная копия)]
+    try:
+        with closing(open_history(path)) as connection:
+            return [
+                (version_id, fetched_at, bool(is_full))
+                for version_id, fetched_at, is_full in connection.execute(
+                    "SELECT id, fetched_at, is_full FROM versions WHERE name = ? ORDER BY id", (name,))
+            ]
+    except sqlite3.Error as e:
+        print(f"Ошибка при чтении истории расписания {name}: {e}")
+        return []
+
+
+def timetable_as_of(name, moment, path=HISTORY_PATH):
+    # Расписание в том виде, в каком оно было скачано последним к моменту moment (date, datetime или ISO-строка)
+    try:
+        with closing(open_history(path)) as connection:
+            version_id = connection.execute(
+                "SELECT MAX(id) FROM versions WHERE name = ? AND fetched_at <= ?", (name, moment_key(moment))
+            ).fetchone()[0]
+            if version_id is None:
+                return None
+            return build_timetable(*load_state(connection, name, version_id))
+    except (sqlite3.Error, ValueError) as e:
+        print(f"Ошибка при чтении истории расписания {name}: {e}")
+        return None
+
+
+def changes_between(name, since, until=None, path=HISTORY_PATH):
+    # Список Change между версиями на два момента - тот же разбор, что и для подсветки изменений
+    from backend import compare_raspisanie
+
+    base = timetable_as_of(name, since, path)
+    new = timetable_as_of(name, until or datetime.now(), path)
+    if base is None or new is None:
+        return []
+    return compare_raspisanie(base, new).changes
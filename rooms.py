@@ -0,0 +1,93 @@
+import re
+
+from config import all_rooms
+from timetable import lesson_bit, lesson_mask
+
+LESSONS = 7
+
+pattern_lessons = re.compile(r'(\d)\s*-\s*(\d)')
+pattern_lesson = re.compile(r'урок\s*(\d)', re.IGNORECASE)
+pattern_floor = re.compile(r'этаж\s*(\d)|(\d)\s*этаж', re.IGNORECASE)
+
+
+def room_floor(room):
+    # Этаж - первая цифра номера кабинета; у спортзалов и т.п. этажа нет
+    return room // 100 if isinstance(room, int) else None
+
+
+def room_distance(room, near):
+    # Спортзалы и прочие кабинеты без номера считаются самыми дальними
+    return abs(room - near) if isinstance(room, int) else float("inf")
+
+
+# Занятость кабинетов из config.all_rooms на каждый день: расписание с изменениями,
+# если на день они есть, иначе постоянное. Все запросы - битовые операции над масками уроков.
+class RoomIndex:
+    def __init__(self, day_rasp, all_rasp, rooms=all_rooms):
+        self.rooms = list(rooms)
+        self.busy = {}
+        for day in [*all_rasp, *(day for day in day_rasp if day not in all_rasp)]:
+            timetable = day_rasp if day in day_rasp else all_rasp
+            self.busy[day] = {room: timetable.room_busy(day, room) for room in self.rooms}
+
+    def busy_mask(self, day, room):
+        return self.busy.get(day, {}).get(room, 0)
+
+    def free_rooms(self, day, first, last=None, rooms=None):
+        # Кабинеты, свободные на всех уроках с first по last
+        mask = lesson_mask(first, last or first)
+        return [room for room in (self.rooms if rooms is None else rooms) if not self.busy_mask(day, room) & mask]
+
+    def free_rooms_by_day(self, first, last=None):
+        return {day: self.free_rooms(day, first, last) for day in self.busy}
+
+    def free_slots(self, day, room, min_length=1):
+        # Непрерывные отрезки свободных уроков: [(первый, последний), ...]
+        busy = self.busy_mask(day, room)
+        slots = []
+        start = None
+        for lesson_number in range(1, LESSONS + 2):
+            is_free = lesson_number <= LESSONS and not busy & lesson_bit(lesson_number)
+            if is_free and start is None:
+                start = lesson_number
+            elif not is_free and start is not None:
+                if lesson_number - start >= min_length:
+                    slots.append((start, lesson_number - 1))
+                start = None
+        return slots
+
+    def find_rooms(self, day, first, last=None, count=1, floor=None, near=None):
+        # count кабинетов, одновременно свободных на уроках с first по last; [] если столько нет
+        rooms = self.free_rooms(day, first, last)
+        if floor is not None:
+            rooms = [room for room in rooms if room_floor(room) == floor]
+        if near is not None:
+            rooms.sort(key=lambda room: room_distance(room, near))
+        return rooms[:count] if len(rooms) >= count else []
+
+    def nearest_free_room(self, day, first, last=None, floor=None, near=None):
+        rooms = self.find_rooms(day, first, last, floor=floor, near=near)
+        return rooms[0] if rooms else None
+
+    def search(self, day, text):
+        # Строка поиска на странице свободных кабинетов, например "этаж 3 4-6" или "31":
+        # "N-M" и "урок N" - свободен на этих уроках, "этаж N" - этаж, остальное - часть номера
+        rooms = self.rooms
+
+        match = pattern_lessons.search(text) or pattern_lesson.search(text)
+        if match:
+            # Номера уроков вне 1..LESSONS (например, "0-3") прижимаются к границам
+            first = int(match.group(1))
+            last = int(match.group(2)) if match.re is pattern_lessons else first
+            first, last = (min(max(number, 1), LESSONS) for number in sorted((first, last)))
+            rooms = self.free_rooms(day, first, last, rooms)
+            text = text[:match.start()] + text[match.end():]
+
+        match = pattern_floor.search(text)
+        if match:
+            floor = int(match.group(1) or match.group(2))
+            rooms = [room for room in rooms if room_floor(room) == floor]
+            text = text[:match.start()] + text[match.end():]
+
+        text = text.strip().lower()
+        return [room for room in rooms if text in str(room).lower()]
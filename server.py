@@ -0,0 +1,152 @@
+import gzip
+import json
+import hashlib
+import threading
+
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+from backend import update_data, get_rasp, load_rasp, dump_snapshot, effective_conflicts, retry_delay
+from rooms import RoomIndex
+from timetable import TeacherSchedule
+
+# Сервер для киосков: расписание скачивается и разбирается здесь один раз,
+# а киоски забирают готовые данные по локальной сети.
+# Запуск: python backend.py serve [порт]
+DEFAULT_PORT = 8080
+REFRESH_INTERVAL = 3600
+
+JSON_TYPE = "application/json; charset=utf-8"
+SNAPSHOT_TYPE = "application/octet-stream"
+
+
+def json_body(data):
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def teacher_lessons(teacher_schedule):
+    # {учитель: [урок, ...]} на неделю с учётом изменений
+    result = {}
+    for teacher in teacher_schedule.teacher_names():
+        lessons = []
+        for timetable, row in teacher_schedule.lessons(teacher):
+            strings = timetable.strings
+            lessons.append({
+                'день': timetable.day_names[timetable.days[row]],
+                'урок': timetable.lessons[row],
+                'класс': strings[timetable.classes[row]],
+                'предмет': strings[timetable.subjects[row]],
+                'кабинет': strings[timetable.rooms[row]],
+            })
+        result[teacher] = lessons
+    return result
+
+
+def build_responses(day_rasp, all_rasp):
+    # Все ответы готовятся один раз после обновления: {путь: (тип, тело, ETag, тело в gzip, ETag gzip)}.
+    # У сжатого варианта свой ETag: тела разные, и кеши не должны их путать
+    room_index = RoomIndex(day_rasp, all_rasp)
+    bodies = {
+        "/timetable/day": (JSON_TYPE, json_body(day_rasp.to_dict())),
+        "/timetable/all": (JSON_TYPE, json_body(all_rasp.to_dict())),
+        "/changes": (JSON_TYPE, json_body([change._asdict() for change in day_rasp.changes or ()])),
+        "/conflicts": (JSON_TYPE, json_body([conflict._asdict() for conflict in effective_conflicts(day_rasp, all_rasp)])),
+        "/teachers": (JSON_TYPE, json_body(teacher_lessons(TeacherSchedule(all_rasp, day_rasp)))),
+        # Маски занятости: бит N-1 - занят на уроке N
+        "/rooms": (JSON_TYPE, json_body({
+            day: {str(room): mask for room, mask in busy.items()} for day, busy in room_index.busy.items()
+        })),
+        "/snapshot": (SNAPSHOT_TYPE, dump_snapshot(day_rasp, all_rasp)),
+    }
+    responses = {}
+    for path, (content_type, body) in bodies.items():
+        digest = hashlib.md5(body).hexdigest()
+        responses[path] = (content_type, body, f'"{digest}"', gzip.compress(body, mtime=0), f'"{digest}-gzip"')
+    return responses
+
+
+class ScheduleServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address):
+        super().__init__(address, ScheduleRequestHandler)
+        self.rasp_const = None
+        self.responses = {}
+        self.set_rasp(*load_rasp())
+
+    def set_rasp(self, day_rasp, all_rasp):
+        # Словарь ответов подменяется целиком, обработчики запросов видят либо старый, либо новый
+        self.rasp_const = all_rasp
+        self.responses = build_responses(day_rasp, all_rasp)
+
+    def refresh(self):
+        # True, если Яндекс Диск ответил по обоим файлам; при сбое раздаются прежние данные
+        try:
+            updated, failed = update_data()
+            if updated:
+                self.set_rasp(*get_rasp(None if "all" in updated else self.rasp_const))
+                print(f"Расписание обновлено: {', '.join(sorted(updated))}")
+            return not failed
+        except Exception as e:
+            print(f"Ошибка обновления расписания: {e}")
+            return False
+
+    def refresh_loop(self, stop):
+        attempt = 0
+        while True:
+            if self.refresh():
+                attempt = 0
+                delay = REFRESH_INTERVAL
+            else:
+                delay = retry_delay(attempt)
+                attempt += 1
+            if stop.wait(delay):
+                return
+
+
+class ScheduleRequestHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        response = self.server.responses.get(self.path.split("?", 1)[0].rstrip("/"))
+        if response is None:
+            self.send_error(404)
+            return
+        content_type, body, etag, gzip_body, gzip_etag = response
+
+        use_gzip = "gzip" in self.headers.get("Accept-Encoding", "")
+        if use_gzip:
+            data, etag = gzip_body, gzip_etag
+        else:
+            data = body
+
+        if etag in (tag.strip() for tag in self.headers.get("If-None-Match", "").split(",")):
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.send_header("Vary", "Accept-Encoding")
+            self.end_headers()
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.send_header("ETag", etag)
+        self.send_header("Vary", "Accept-Encoding")
+        if use_gzip:
+            self.send_header("Content-Encoding", "gzip")
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve(port=DEFAULT_PORT):
+    server = ScheduleServer(("", port))
+    stop = threading.Event()
+    threading.Thread(target=server.refresh_loop, args=(stop,), daemon=True).start()
+    print(f"Сервер расписания: http://localhost:{port}/timetable/day")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stop.set()
+        server.server_close()
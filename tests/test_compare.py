@@ -0,0 +1,74 @@
+import unittest
+
+from backend import compare_raspisanie
+from timetable import Timetable, Change, CANCELLED, ADDED, ROOM_CHANGED, TEACHER_SUBSTITUTED, MOVED, REPLACED
+
+# Сравнение расписания на день с постоянным
+
+DAY = "ПОНЕДЕЛЬНИК"
+CLASS = "5 а"
+# Урок, который не меняется: у класса должен остаться хоть один урок в новом расписании
+UNCHANGED = (7, "Физкультура", "спортзал", "Кузнецов К.К.")
+
+
+def timetable(lessons):
+    # lessons: [(урок, предмет, кабинет, учитель)] для одного класса в один день
+    result = Timetable()
+    for lesson_number, subject, room, teacher in [*lessons, UNCHANGED]:
+        result.add(DAY, lesson_number, CLASS, subject, room, teacher)
+    return result
+
+
+def changes(base, new):
+    return compare_raspisanie(timetable(base), timetable(new)).changes
+
+
+class CompareTest(unittest.TestCase):
+    def test_no_changes(self):
+        lessons = [(1, "Алгебра", "113", "Иванов И.И.")]
+        self.assertEqual(changes(lessons, lessons), [])
+
+    def test_cancelled(self):
+        self.assertEqual(changes([(1, "Алгебра", "113", "Иванов И.И.")], []), [
+            Change(CANCELLED, DAY, CLASS, 1, before=("Алгебра", "113", "Иванов И.И.")),
+        ])
+
+    def test_added(self):
+        self.assertEqual(changes([], [(1, "Алгебра", "113", "Иванов И.И.")]), [
+            Change(ADDED, DAY, CLASS, 1, after=("Алгебра", "113", "Иванов И.И.")),
+        ])
+
+    def test_room_changed(self):
+        self.assertEqual(changes([(1, "Алгебра", "113", "Иванов И.И.")], [(1, "Алгебра", "214", "Иванов И.И.")]), [
+            Change(ROOM_CHANGED, DAY, CLASS, 1, ("Алгебра", "113", "Иванов И.И."), ("Алгебра", "214", "Иванов И.И.")),
+        ])
+
+    def test_teacher_substituted(self):
+        self.assertEqual(changes([(1, "Алгебра", "113", "Иванов И.И.")], [(1, "Алгебра", "113", "Петрова А.А.")]), [
+            Change(TEACHER_SUBSTITUTED, DAY, CLASS, 1,
+                   ("Алгебра", "113", "Иванов И.И."), ("Алгебра", "113", "Петрова А.А.")),
+        ])
+
+    def test_moved(self):
+        self.assertEqual(changes([(2, "Алгебра", "113", "Иванов И.И.")], [(4, "Алгебра", "214", "Иванов И.И.")]), [
+            Change(MOVED, DAY, CLASS, 4, ("Алгебра", "113", "Иванов И.И."), ("Алгебра", "214", "Иванов И.И."), 2),
+        ])
+
+    def test_replaced(self):
+        self.assertEqual(changes([(1, "Алгебра", "113", "Иванов И.И.")], [(1, "Химия", "220", "Петрова А.А.")]), [
+            Change(REPLACED, DAY, CLASS, 1, ("Алгебра", "113", "Иванов И.И."), ("Химия", "220", "Петрова А.А.")),
+        ])
+
+    def test_moved_into_slot_of_cancelled_lesson(self):
+        # Урок Ивановой перенесён с 3-го на 5-й, где отменили урок Петровой по тому же предмету.
+        # Это перенос и отмена, а не замена учителя на 5-м уроке и отмена 3-го
+        base = [(3, "Английский", "201", "Иванова М.М."), (5, "Английский", "202", "Петрова А.А.")]
+        new = [(5, "Английский", "201", "Иванова М.М.")]
+        self.assertEqual(changes(base, new), [
+            Change(MOVED, DAY, CLASS, 5, ("Английский", "201", "Иванова М.М."), ("Английский", "201", "Иванова М.М."), 3),
+            Change(CANCELLED, DAY, CLASS, 5, before=("Английский", "202", "Петрова А.А.")),
+        ])
+
+
+if __name__ == "__main__":
+    unittest.main()
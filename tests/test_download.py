@@ -0,0 +1,227 @@
+import os
+import json
+import hashlib
+import tempfile
+import threading
+import unittest
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from unittest import mock
+from urllib.parse import urlsplit, parse_qs
+
+import requests
+
+import backend
+
+# Загрузка файлов с Яндекс Диска против локальной заглушки API
+
+DATA = bytes(range(256)) * 64
+
+
+def file_metadata(data):
+    return {
+        "md5": hashlib.md5(data).hexdigest(),
+        "sha256": hashlib.sha256(data).hexdigest(),
+        "modified": "2026-10-01T08:00:00+00:00",
+        "size": len(data),
+    }
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    # /resources и /resources/download - как у API Яндекс Диска, /files/<ключ> - сам файл
+    def do_GET(self):
+        url = urlsplit(self.path)
+        query = parse_qs(url.query)
+        server = self.server
+        server.requests.append((url.path, self.headers.get("Range")))
+
+        if url.path == "/resources":
+            self.send_json(file_metadata(server.files[query["public_key"][0]]))
+        elif url.path == "/resources/download":
+            self.send_json({"href": f"http://127.0.0.1:{server.server_port}/files/{query['public_key'][0]}"})
+        elif url.path.startswith("/files/"):
+            self.send_file(server.files[url.path[len("/files/"):]])
+        else:
+            self.send_error(404)
+
+    def send_json(self, data):
+        body = json.dumps(data).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_file(self, data):
+        range_header = self.headers.get("Range")
+        if range_header and self.server.ranges:
+            start = int(range_header.removeprefix("bytes=").split("-")[0])
+            if start >= len(data):
+                self.send_response(416)
+                self.send_header("Content-Range", f"bytes */{len(data)}")
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            self.send_response(206)
+            self.send_header("Content-Range", f"bytes {start}-{len(data) - 1}/{len(data)}")
+            data = data[start:]
+        else:
+            self.send_response(200)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), StubHandler)
+        self.files = {}
+        self.requests = []
+        # False - сервер не поддерживает Range и всегда отдаёт файл целиком
+        self.ranges = True
+
+    def file_requests(self):
+        return [range_header for path, range_header in self.requests if path.startswith("/files/")]
+
+
+class StubServerTest(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "day.xlsx")
+        self.part_path = self.path + ".part"
+
+        self.server = StubServer()
+        self.server.files["day"] = DATA
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+
+        self.session = requests.Session()
+        self.addCleanup(self.session.close)
+        self.url = f"http://127.0.0.1:{self.server.server_port}/files/day"
+
+    def write_part(self, data, metadata):
+        # Остаток прошлой оборвавшейся загрузки
+        with open(self.part_path, "wb") as f:
+            f.write(data)
+        backend.write_metadata(self.part_path, metadata)
+
+    def read(self, path):
+        with open(path, "rb") as f:
+            return f.read()
+
+    def assertNoPart(self):
+        self.assertFalse(os.path.exists(self.part_path))
+        self.assertFalse(os.path.exists(self.part_path + ".meta"))
+
+
+class DownloadTest(StubServerTest):
+    def test_downloads_whole_file(self):
+        backend.download_file(self.session, self.url, self.path, file_metadata(DATA))
+
+        self.assertEqual(self.read(self.path), DATA)
+        self.assertEqual(self.server.file_requests(), [None])
+        self.assertNoPart()
+
+    def test_resumes_interrupted_download(self):
+        self.write_part(DATA[:1000], file_metadata(DATA))
+
+        backend.download_file(self.session, self.url, self.path, file_metadata(DATA))
+
+        self.assertEqual(self.read(self.path), DATA)
+        self.assertEqual(self.server.file_requests(), ["bytes=1000-"])
+        self.assertNoPart()
+
+    def test_part_of_other_version_is_not_resumed(self):
+        self.write_part(b"x" * 1000, file_metadata(b"old version"))
+
+        backend.download_file(self.session, self.url, self.path, file_metadata(DATA))
+
+        self.assertEqual(self.read(self.path), DATA)
+        self.assertEqual(self.server.file_requests(), [None])
+
+    def test_complete_part_with_416(self):
+        self.write_part(DATA, file_metadata(DATA))
+
+        backend.download_file(self.session, self.url, self.path, file_metadata(DATA))
+
+        self.assertEqual(self.read(self.path), DATA)
+        self.assertEqual(self.server.file_requests(), [f"bytes={len(DATA)}-"])
+        self.assertNoPart()
+
+    def test_server_ignoring_range_restarts_download(self):
+        self.server.ranges = False
+        self.write_part(DATA[:1000], file_metadata(DATA))
+
+        backend.download_file(self.session, self.url, self.path, file_metadata(DATA))
+
+        self.assertEqual(self.read(self.path), DATA)
+        self.assertNoPart()
+
+    def test_checksum_mismatch_keeps_old_file(self):
+        with open(self.path, "wb") as f:
+            f.write(b"old")
+        metadata = file_metadata(DATA)
+        metadata["sha256"] = hashlib.sha256(b"other").hexdigest()
+
+        with self.assertRaises(ValueError):
+            backend.download_file(self.session, self.url, self.path, metadata)
+
+        self.assertEqual(self.read(self.path), b"old")
+        self.assertNoPart()
+
+    def test_size_mismatch(self):
+        metadata = file_metadata(DATA)
+        metadata["size"] += 1
+
+        with self.assertRaises(ValueError):
+            backend.download_file(self.session, self.url, self.path, metadata)
+
+        self.assertFalse(os.path.exists(self.path))
+        self.assertNoPart()
+
+    def test_corrupted_part_is_discarded(self):
+        # Докачанный файл не сошёлся - испорченная часть удаляется, следующая попытка качает заново
+        self.write_part(b"x" * 1000, file_metadata(DATA))
+
+        with self.assertRaises(ValueError):
+            backend.download_file(self.session, self.url, self.path, file_metadata(DATA))
+        self.assertNoPart()
+
+        backend.download_file(self.session, self.url, self.path, file_metadata(DATA))
+        self.assertEqual(self.read(self.path), DATA)
+
+
+class UpdateFileTest(StubServerTest):
+    def setUp(self):
+        super().setUp()
+        for name in ("_session", "_monitor"):
+            self.addCleanup(setattr, backend, name, None)
+            setattr(backend, name, None)
+        patcher = mock.patch.object(backend, "API_URL", f"http://127.0.0.1:{self.server.server_port}/resources")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_unchanged_metadata_skips_download(self):
+        self.assertIs(backend.download_yandex_xlsx("day", self.path), True)
+        self.assertEqual(backend.read_metadata(self.path), file_metadata(DATA))
+        self.server.requests.clear()
+
+        self.assertIs(backend.download_yandex_xlsx("day", self.path), False)
+        self.assertEqual(self.server.requests, [("/resources", None)])
+
+    def test_changed_metadata_downloads_again(self):
+        backend.download_yandex_xlsx("day", self.path)
+        self.server.files["day"] = DATA[::-1]
+
+        self.assertIs(backend.download_yandex_xlsx("day", self.path), True)
+        self.assertEqual(self.read(self.path), DATA[::-1])
+
+
+if __name__ == "__main__":
+    unittest.main()
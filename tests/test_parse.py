@@ -0,0 +1,96 @@
+import os
+import re
+import zipfile
+import tempfile
+import unittest
+
+import openpyxl
+
+import backend
+
+# Разбор скачанной книги: python -m unittest discover -s tests -t .
+
+
+def write_workbook(path, lessons):
+    # lessons: [(день, урок, класс, предмет, кабинет, учитель)] для классов "5 а" и "6 б"
+    columns = {"5 а": 2, "6 б": 4}
+    workbook = openpyxl.Workbook()
+    sheet = workbook.active
+    sheet.append(["Расписание"])
+    sheet.append(["День", "Урок", "5 а", None, "6 б", None])
+    sheet.append(["", "№"])
+    for day in dict.fromkeys(lesson[0] for lesson in lessons):
+        for lesson_number in range(1, 8):
+            subject_line = [day if lesson_number == 1 else None, lesson_number, None, None, None, None]
+            teacher_line = [None] * 6
+            for lesson_day, number, class_name, subject, room, teacher in lessons:
+                if (lesson_day, number) == (day, lesson_number):
+                    col = columns[class_name]
+                    subject_line[col], subject_line[col + 1] = subject, room
+                    teacher_line[col] = teacher
+            sheet.append(subject_line)
+            sheet.append(teacher_line)
+    workbook.save(path)
+
+
+def set_dimension(path, ref):
+    # Переписывает записанный в листе размер <dimension>, как это делают некоторые программы
+    with zipfile.ZipFile(path) as source:
+        items = [(info, source.read(info.filename)) for info in source.infolist()]
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as target:
+        for info, data in items:
+            if info.filename.startswith("xl/worksheets/"):
+                data = re.sub(rb'<dimension ref="[^"]*"\s*/>', f'<dimension ref="{ref}"/>'.encode(), data)
+            target.writestr(info, data)
+
+
+class ParseWorkbookTest(unittest.TestCase):
+    LESSONS = [
+        ("ПОНЕДЕЛЬНИК", 1, "5 а", "Алгебра", 113, "Иванов И.И."),
+        ("ПОНЕДЕЛЬНИК", 2, "6 б", "Химия", 220, "Петрова А.А."),
+        ("ВТОРНИК", 3, "5 а", "История", 306, "Сидоров С.С."),
+    ]
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.addCleanup(os.chdir, os.getcwd())
+        os.chdir(directory.name)
+        os.mkdir("tmp")
+
+    def test_parses_lessons(self):
+        write_workbook("tmp/day.xlsx", self.LESSONS)
+        timetable = backend.get_raspisanie("day.xlsx")
+        self.assertEqual(timetable.to_dict(), {
+            "ПОНЕДЕЛЬНИК": {
+                "5 а": [{'урок': 1, 'предмет': "Алгебра", 'кабинет': "113", 'учитель': "Иванов И.И."}],
+                "6 б": [{'урок': 2, 'предмет': "Химия", 'кабинет': "220", 'учитель': "Петрова А.А."}],
+            },
+            "ВТОРНИК": {
+                "5 а": [{'урок': 3, 'предмет': "История", 'кабинет': "306", 'учитель': "Сидоров С.С."}],
+            },
+        })
+
+    def test_ignores_wrong_stored_dimension(self):
+        write_workbook("tmp/day.xlsx", self.LESSONS)
+        expected = backend.get_raspisanie("day.xlsx").to_dict()
+        set_dimension("tmp/day.xlsx", "A1:A1")
+        self.assertEqual(backend.get_raspisanie("day.xlsx").to_dict(), expected)
+
+    def test_workbook_without_lessons_is_an_error(self):
+        openpyxl.Workbook().save("tmp/day.xlsx")
+        with self.assertRaises(ValueError):
+            backend.get_raspisanie("day.xlsx")
+
+    def test_stale_csv_is_not_used_when_workbook_is_broken(self):
+        with open("tmp/day.csv", "w", encoding="utf-8") as f:
+            f.write("старый файл\n")
+        with open("tmp/day.xlsx", "wb") as f:
+            f.write(b"not a workbook")
+        os.utime("tmp/day.csv", (0, 0))
+        with self.assertRaises(Exception):
+            backend.read_raspisanie("day")
+
+
+if __name__ == "__main__":
+    unittest.main()
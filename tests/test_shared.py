@@ -0,0 +1,53 @@
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+import requests
+
+import backend
+
+
+class SharedObjectsTest(unittest.TestCase):
+    def setUp(self):
+        self.addCleanup(setattr, backend, "_session", None)
+        self.addCleanup(setattr, backend, "_monitor", None)
+        backend._session = None
+        backend._monitor = None
+
+    def test_one_session_for_parallel_downloads(self):
+        created = []
+        original_init = requests.Session.__init__
+
+        def slow_init(session):
+            # Окно между проверкой и присваиванием, в которое попадает второй поток
+            time.sleep(0.05)
+            original_init(session)
+            created.append(session)
+
+        with mock.patch.object(requests.Session, "__init__", slow_init):
+            with ThreadPoolExecutor(max_workers=2) as executor:
+                sessions = list(executor.map(lambda _: backend.get_session(), range(2)))
+
+        self.assertEqual(len(created), 1)
+        self.assertIs(sessions[0], sessions[1])
+
+    def test_one_monitor_for_parallel_downloads(self):
+        created = []
+        original_init = backend.ConnectivityMonitor.__init__
+
+        def slow_init(monitor, *args, **kwargs):
+            time.sleep(0.05)
+            original_init(monitor, *args, **kwargs)
+            created.append(monitor)
+
+        with mock.patch.object(backend.ConnectivityMonitor, "__init__", slow_init):
+            with ThreadPoolExecutor(max_workers=2) as executor:
+                monitors = list(executor.map(lambda _: backend.get_monitor(), range(2)))
+
+        self.assertEqual(len(created), 1)
+        self.assertIs(monitors[0], monitors[1])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,294 @@
+import sys
+import copy
+
+from array import array
+from collections.abc import Mapping
+from typing import NamedTuple
+
+
+# Виды изменений в расписании на день относительно постоянного
+CANCELLED = "cancelled"       # урок отменён
+ADDED = "added"               # добавлен новый урок
+ROOM_CHANGED = "room"         # тот же урок в другом кабинете
+TEACHER_SUBSTITUTED = "teacher"  # замена учителя
+MOVED = "moved"               # урок перенесён на другой номер
+REPLACED = "replaced"         # вместо одного предмета поставлен другой
+
+
+class Change(NamedTuple):
+    kind: str
+    day: str
+    class_name: str
+    lesson: int
+    # (предмет, кабинет, учитель) до и после изменения
+    before: tuple | None = None
+    after: tuple | None = None
+    # Для переноса - номер урока в постоянном расписании
+    from_lesson: int | None = None
+
+
+# Виды конфликтов в расписании (см. backend.find_conflicts)
+ROOM_CONFLICT = "room"        # в кабинете одновременно уроки разных учителей
+TEACHER_CONFLICT = "teacher"  # учитель одновременно стоит в разных кабинетах
+
+
+class Conflict(NamedTuple):
+    kind: str
+    day: str
+    lesson: int
+    # Кабинет или учитель, на котором пересеклись уроки
+    key: str
+    classes: tuple
+    # Для кабинета - учителя, для учителя - кабинеты
+    others: tuple
+
+
+def room_key(room):
+    # В файлах кабинет иногда записан с подчёркиванием, например "22_4"
+    return room.replace("_", "")
+
+
+def lesson_bit(lesson_number):
+    return 1 << (lesson_number - 1)
+
+
+def lesson_mask(first, last):
+    # Маска уроков с first по last включительно
+    if first < 1 or last < first:
+        raise ValueError(f"неверный диапазон уроков: {first}-{last}")
+    return ((1 << (last - first + 1)) - 1) << (first - 1)
+
+
+def changed_slots(changes):
+    # {(день, класс, урок)} ячеек, которые нужно подсветить
+    slots = set()
+    for change in changes or ():
+        slots.add((change.day, change.class_name, change.lesson))
+        if change.from_lesson is not None:
+            slots.add((change.day, change.class_name, change.from_lesson))
+    return slots
+
+
+def conflict_slots(conflicts):
+    # {(день, класс, урок)} ячеек с конфликтами
+    return {
+        (conflict.day, class_name, conflict.lesson)
+        for conflict in conflicts or ()
+        for class_name in conflict.classes
+    }
+
+
+# Расписание в колоночном виде: строки хранятся один раз в общей таблице,
+# а каждый урок - это набор индексов в параллельных массивах.
+# Для старого кода Timetable ведёт себя как {день: {класс: [урок, ...]}}.
+class Timetable(Mapping):
+    def __init__(self):
+        self.strings = []
+        self.string_ids = {}
+
+        self.day_names = []
+        self.day_ids = {}
+
+        self.days = array('B')
+        self.lessons = array('B')
+        self.classes = array('H')
+        self.subjects = array('H')
+        self.rooms = array('H')
+        self.teachers = array('H')
+
+        # Индекс учителей: id учителя -> номера строк его уроков
+        self.teacher_rows = {}
+        # Занятость кабинетов: кабинет -> [битовая маска уроков для каждого дня]
+        self.room_bits = {}
+
+        # Список Change после сравнения с постоянным расписанием (см. compare_raspisanie)
+        self.changes = None
+        # Список Conflict, найденных сразу после разбора файла
+        self.conflicts = []
+
+    def intern(self, value):
+        string_id = self.string_ids.get(value)
+        if string_id is None:
+            string_id = len(self.strings)
+            self.strings.append(sys.intern(value))
+            self.string_ids[value] = string_id
+        return string_id
+
+    def add_day(self, day):
+        day_id = self.day_ids.get(day)
+        if day_id is None:
+            day_id = len(self.day_names)
+            self.day_names.append(day)
+            self.day_ids[day] = day_id
+        return day_id
+
+    def add(self, day, lesson_number, class_name, subject, room, teacher):
+        row = len(self.days)
+        self.days.append(self.add_day(day))
+        self.lessons.append(lesson_number)
+        self.classes.append(self.intern(class_name))
+        self.subjects.append(self.intern(subject))
+        self.rooms.append(self.intern(room))
+        self.teachers.append(self.intern(teacher))
+        self.index_row(row)
+
+    def index_row(self, row):
+        # Индексы пополняются в том же проходе, что и разбор файла
+        self.teacher_rows.setdefault(self.teachers[row], array('I')).append(row)
+
+        room = room_key(self.strings[self.rooms[row]])
+        if room:
+            day_id = self.days[row]
+            bits = self.room_bits.setdefault(room, [])
+            if len(bits) <= day_id:
+                bits.extend([0] * (day_id + 1 - len(bits)))
+            bits[day_id] |= lesson_bit(self.lessons[row])
+
+    def build_indexes(self):
+        self.teacher_rows = {}
+        self.room_bits = {}
+        for row in range(len(self.days)):
+            self.index_row(row)
+
+    def room_busy(self, day, room):
+        # Битовая маска уроков, на которых кабинет занят в этот день
+        day_id = self.day_ids.get(day)
+        bits = self.room_bits.get(room_key(str(room)), ())
+        return bits[day_id] if day_id is not None and day_id < len(bits) else 0
+
+    def teacher_names(self):
+        return sorted(self.strings[teacher_id] for teacher_id in self.teacher_rows if self.strings[teacher_id])
+
+    def lessons_of_teacher(self, teacher):
+        # Номера строк уроков учителя, без перебора всего расписания
+        return self.teacher_rows.get(self.string_ids.get(teacher), ())
+
+    def with_changes(self, changes):
+        # Лёгкая копия со списком изменений: строки и массивы общие с исходным расписанием
+        timetable = copy.copy(self)
+        timetable.changes = changes
+        return timetable
+
+    def lesson_dict(self, row):
+        strings = self.strings
+        return {
+            'урок': self.lessons[row],
+            'предмет': strings[self.subjects[row]],
+            'кабинет': strings[self.rooms[row]],
+            'учитель': strings[self.teachers[row]],
+        }
+
+    def day_rows(self, day):
+        day_id = self.day_ids.get(day)
+        return [row for row, row_day in enumerate(self.days) if row_day == day_id]
+
+    def class_names(self, day):
+        # Классы, у которых в этот день есть уроки, - без сборки словарей уроков
+        day_id = self.day_ids.get(day)
+        strings = self.strings
+        return sorted({strings[class_id] for row_day, class_id in zip(self.days, self.classes) if row_day == day_id})
+
+    def class_rows(self, day, class_name):
+        day_id = self.day_ids.get(day)
+        class_id = self.string_ids.get(class_name)
+        return [
+            row for row, (row_day, row_class) in enumerate(zip(self.days, self.classes))
+            if row_day == day_id and row_class == class_id
+        ]
+
+    def day_dict(self, day_id):
+        strings = self.strings
+        classes = {}
+        for row in self.day_rows(self.day_names[day_id]):
+            classes.setdefault(strings[self.classes[row]], []).append(self.lesson_dict(row))
+        return classes
+
+    def to_dict(self):
+        return {day: self.day_dict(day_id) for day_id, day in enumerate(self.day_names)}
+
+    def to_state(self):
+        # Представление из простых типов для marshal (см. backend.save_snapshot)
+        return (
+            self.strings, self.day_names,
+            self.days.tobytes(), self.lessons.tobytes(), self.classes.tobytes(),
+            self.subjects.tobytes(), self.rooms.tobytes(), self.teachers.tobytes(),
+            None if self.changes is None else [tuple(change) for change in self.changes],
+            [tuple(conflict) for conflict in self.conflicts],
+        )
+
+    @classmethod
+    def from_state(cls, state):
+        timetable = cls()
+        (strings, day_names, days, lessons, classes, subjects, rooms, teachers, changes, conflicts) = state
+
+        for value in strings:
+            timetable.intern(value)
+        for day in day_names:
+            timetable.add_day(day)
+
+        timetable.days.frombytes(days)
+        timetable.lessons.frombytes(lessons)
+        timetable.classes.frombytes(classes)
+        timetable.subjects.frombytes(subjects)
+        timetable.rooms.frombytes(rooms)
+        timetable.teachers.frombytes(teachers)
+        timetable.build_indexes()
+        if changes is not None:
+            timetable.changes = [Change(*change) for change in changes]
+        timetable.conflicts = [Conflict(*conflict) for conflict in conflicts]
+        return timetable
+
+    def __len__(self):
+        return len(self.day_names)
+
+    def __iter__(self):
+        return iter(self.day_names)
+
+    def __contains__(self, day):
+        return day in self.day_ids
+
+    def __getitem__(self, day):
+        return self.day_dict(self.day_ids[day])
+
+
+# Расписание учителей: постоянное расписание на неделю, поверх которого для дней
+# из файла изменений берутся уроки из него. Изменения на день заменяются отдельно
+# от постоянного расписания, поэтому при обновлении только day.csv ничего не пересобирается.
+class TeacherSchedule:
+    def __init__(self, base=None, day_rasp=None):
+        self.base = Timetable()
+        self.day_rasp = Timetable()
+        # {учитель: {(день, урок)}} ячеек, затронутых изменениями
+        self.changed = {}
+        self.set_base(base if base is not None else Timetable())
+        self.set_day(day_rasp if day_rasp is not None else Timetable())
+
+    def set_base(self, base):
+        self.base = base
+
+    def set_day(self, day_rasp):
+        self.day_rasp = day_rasp
+
+        changed = {}
+        for change in day_rasp.changes or ():
+            if change.after is not None:
+                changed.setdefault(change.after[2], set()).add((change.day, change.lesson))
+            if change.before is not None:
+                lesson_number = change.lesson if change.from_lesson is None else change.from_lesson
+                changed.setdefault(change.before[2], set()).add((change.day, lesson_number))
+        self.changed = changed
+
+    def teacher_names(self):
+        return sorted(set(self.base.teacher_names()) | set(self.day_rasp.teacher_names()))
+
+    def lessons(self, teacher):
+        # (расписание, номер строки) для каждого урока учителя с учётом изменений
+        overlay_days = self.day_rasp.day_ids
+        for row in self.day_rasp.lessons_of_teacher(teacher):
+            yield self.day_rasp, row
+        for row in self.base.lessons_of_teacher(teacher):
+            if self.base.day_names[self.base.days[row]] not in overlay_days:
+                yield self.base, row
+
+    def changed_slots(self, teacher):
+        return self.changed.get(teacher, set())
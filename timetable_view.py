@@ -0,0 +1,192 @@
+from PyQt6.QtWidgets import QTableView, QStyledItemDelegate, QAbstractItemView, QHeaderView
+from PyQt6.QtCore import Qt, QAbstractTableModel, QModelIndex, QRect, QTimer
+from PyQt6.QtGui import QColor, QFont, QFontMetrics, QPainter, QPen
+
+# Роли, в которых модель отдаёт признаки подсветки изменённой ячейки и конфликта в ней
+HighlightRole = Qt.ItemDataRole.UserRole + 1
+ConflictRole = Qt.ItemDataRole.UserRole + 2
+
+EMPTY_CELL = ("—", False, False)
+
+
+def lesson_text(timetable, row):
+    strings = timetable.strings
+    room = strings[timetable.rooms[row]]
+    return f"{strings[timetable.subjects[row]]} {f'({room})' if room else ''}\n{strings[timetable.teachers[row]]}"
+
+
+def build_day_cells(timetable, day, changed, conflicts=frozenset()):
+    # Готовое содержимое сетки дня для TimetableModel.set_grid:
+    # (классы, {(строка, столбец): (текст, подсветка, конфликт)})
+    texts = {}
+    for row in timetable.day_rows(day):
+        key = (timetable.lessons[row], timetable.strings[timetable.classes[row]])
+        texts.setdefault(key, []).append(lesson_text(timetable, row))
+
+    class_names = sorted({class_name for _, class_name in texts})
+
+    cells = {}
+    for row in range(7):
+        for col, class_name in enumerate(class_names):
+            lesson_texts = texts.get((row + 1, class_name))
+            content = "\n---\n".join(lesson_texts) if lesson_texts else EMPTY_CELL[0]
+            slot = (day, class_name, row + 1)
+            cells[(row, col)] = (content, slot in changed, slot in conflicts)
+    return class_names, cells
+
+
+def build_teacher_cells(teacher_schedule, teacher, days):
+    # Ячейки недели учителя (см. TeacherSchedule): строки - уроки, столбцы - дни
+    texts = {}
+    for timetable, row in teacher_schedule.lessons(teacher):
+        strings = timetable.strings
+        day = timetable.day_names[timetable.days[row]]
+        lesson_number = timetable.lessons[row]
+        if day not in days or not 1 <= lesson_number <= 7:
+            continue
+        texts.setdefault((lesson_number - 1, days.index(day)), []).append(
+            f"{strings[timetable.subjects[row]]} ({strings[timetable.rooms[row]]})\n{strings[timetable.classes[row]]}")
+
+    cells = {key: ("\n---\n".join(lesson_texts), False, False) for key, lesson_texts in texts.items()}
+
+    # Подсвечиваем и изменённые уроки, и отменённые (в этом случае ячейка пустая)
+    for day, lesson_number in teacher_schedule.changed_slots(teacher):
+        if day in days and 1 <= lesson_number <= 7:
+            key = (lesson_number - 1, days.index(day))
+            cells[key] = (cells.get(key, EMPTY_CELL)[0], True, False)
+    return cells
+
+
+# Общая модель для сетки на главной странице, страницы класса и страницы учителя:
+# строки - номера уроков, столбцы - классы или дни, в ячейках (текст, подсветка, конфликт)
+class TimetableModel(QAbstractTableModel):
+    def __init__(self, row_labels, parent=None):
+        super().__init__(parent)
+        self.row_labels = list(row_labels)
+        self.column_labels = []
+        self.cells = {}
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.row_labels)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.column_labels)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        text, highlighted, conflict = self.cells.get((index.row(), index.column()), EMPTY_CELL)
+        if role == Qt.ItemDataRole.DisplayRole:
+            return text
+        if role == HighlightRole:
+            return highlighted
+        if role == ConflictRole:
+            return conflict
+        return None
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if role != Qt.ItemDataRole.DisplayRole:
+            return None
+        labels = self.column_labels if orientation == Qt.Orientation.Horizontal else self.row_labels
+        return labels[section] if section < len(labels) else None
+
+    def set_grid(self, column_labels, cells):
+        # cells: {(строка, столбец): (текст, подсветка, конфликт)}; пустые ячейки можно не передавать
+        if list(column_labels) != self.column_labels:
+            self.beginResetModel()
+            self.column_labels = list(column_labels)
+            self.cells = cells
+            self.endResetModel()
+            return
+
+        # Набор столбцов тот же - сообщаем виду только об изменившихся ячейках
+        changed = [
+            key for key in cells.keys() | self.cells.keys()
+            if cells.get(key, EMPTY_CELL) != self.cells.get(key, EMPTY_CELL)
+        ]
+        self.cells = cells
+        for row, column in changed:
+            index = self.index(row, column)
+            self.dataChanged.emit(index, index)
+
+
+# Рисует ячейку урока: скруглённая рамка (красная при конфликте), жёлтый фон для изменений,
+# текст с переносами
+class LessonDelegate(QStyledItemDelegate):
+    def __init__(self, font_size=None, padding=8, parent=None):
+        super().__init__(parent)
+        self.font_size = font_size
+        self.padding = padding
+
+    def cell_font(self, option):
+        font = QFont(option.font)
+        if self.font_size is not None:
+            font.setPointSize(self.font_size)
+        return font
+
+    def paint(self, painter, option, index):
+        painter.save()
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+
+        rect = option.rect.adjusted(2, 2, -2, -2)
+        painter.setPen(QPen(QColor("red"), 3) if index.data(ConflictRole) else QColor("gray"))
+        painter.setBrush(QColor("yellow") if index.data(HighlightRole) else QColor("white"))
+        painter.drawRoundedRect(rect, 5, 5)
+
+        painter.setPen(QColor("black"))
+        painter.setFont(self.cell_font(option))
+        text_rect = rect.adjusted(self.padding, self.padding, -self.padding, -self.padding)
+        painter.drawText(text_rect, Qt.AlignmentFlag.AlignVCenter | Qt.TextFlag.TextWordWrap, index.data())
+        painter.restore()
+
+    def sizeHint(self, option, index):
+        size = super().sizeHint(option, index)
+        view = self.parent()
+        width = view.columnWidth(index.column()) if view is not None else size.width()
+
+        text_width = max(width - 2 * self.padding - 4, 1)
+        metrics = QFontMetrics(self.cell_font(option))
+        bounds = metrics.boundingRect(QRect(0, 0, text_width, 100000), Qt.TextFlag.TextWordWrap, index.data() or "")
+        size.setHeight(bounds.height() + 2 * self.padding + 4)
+        return size
+
+
+# Таблица без выделения и редактирования; высота строк подстраивается под текст ячеек
+class TimetableView(QTableView):
+    def __init__(self, model, delegate, column_width=None, parent=None):
+        super().__init__(parent)
+        self.setModel(model)
+        delegate.setParent(self)
+        self.setItemDelegate(delegate)
+
+        self.setSelectionMode(QAbstractItemView.SelectionMode.NoSelection)
+        self.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.setFocusPolicy(Qt.FocusPolicy.NoFocus)
+        self.setShowGrid(False)
+        self.setWordWrap(True)
+        self.setVerticalScrollMode(QAbstractItemView.ScrollMode.ScrollPerPixel)
+        self.setHorizontalScrollMode(QAbstractItemView.ScrollMode.ScrollPerPixel)
+
+        header = self.horizontalHeader()
+        header.setFont(QFont("Arial", 12, QFont.Weight.Bold))
+        if column_width is None:
+            header.setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
+        else:
+            header.setDefaultSectionSize(column_width)
+            header.setSectionResizeMode(QHeaderView.ResizeMode.Fixed)
+        self.verticalHeader().setFont(QFont("Arial", 12))
+
+        # Высоты пересчитываются один раз после пачки изменений, а не на каждую ячейку
+        self.resize_pending = False
+        header.sectionResized.connect(self.schedule_resize_rows)
+        model.modelReset.connect(self.schedule_resize_rows)
+        model.dataChanged.connect(self.schedule_resize_rows)
+
+    def schedule_resize_rows(self, *args):
+        if not self.resize_pending:
+            self.resize_pending = True
+            QTimer.singleShot(0, self.resize_rows)
+
+    def resize_rows(self):
+        self.resize_pending = False
+        self.resizeRowsToContents()